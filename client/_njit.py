@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# ============================================================
+# _njit.py - numba JIT 래퍼
+# numba 미설치 시 데코레이터가 원본 함수를 그대로 반환
+# 시그니처 문자열을 준 커널은 import 시점에 즉시 컴파일 (첫 호출 지연 없음),
+# cache=True → __pycache__에 기계어 저장, 다음 실행부터 로드만 수행
+# ============================================================
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 없음 → no-op 데코레이터 (@njit / @njit(...) 모두 지원)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
@@ -4,60 +4,153 @@
 # 실제 데이터 없이도 시뮬레이션 가능
 # ============================================================
 
+import os
+import sys
+import functools
 import numpy as np
 import pandas as pd
 import json
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from datetime import date, timedelta
 from strategy import MACrossoverStrategy, BacktestEngine
 
+# orjson 설치 시 결과 직렬화에 사용 (없으면 표준 json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+_SAMPLE_FORMAT = 2   # 샘플 생성 방식·dtype 변경 시 올림 → 이전 .npz 캐시 무시 (2: int32/uint32 컬럼)
+
+
+_COLUMN_CACHE: dict = {}   # (days, initial_price, seed) → 컬럼 dict
+
+
+def _generate_columns(days: int, initial_prices, seeds) -> dict:
+    """
+    여러 종목 샘플 OHLCV 수치 컬럼 일괄 생성 → (종목수, days) 배열
+    난수는 종목별 seed 스트림에서 뽑아 단일 종목 생성과 동일한 값 유지
+    """
+    n     = len(seeds)
+    trend = 0.0002
+    returns = np.empty((n, days - 1))
+    vol_raw = np.empty((n, days))
+    noise   = np.empty((n, 3, days))       # high / low / open 노이즈
+    scales  = np.array([[0.005], [0.005], [0.003]])
+    for k, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        returns[k] = rng.normal(trend, 0.015, size=days - 1)
+        vol_raw[k] = rng.lognormal(15, 0.5, size=days)
+        noise[k]   = rng.normal(0, scales, size=(3, days))
+
+    # 랜덤워크 + 트렌드 (전 종목 일괄 계산)
+    p0 = np.asarray(initial_prices, dtype=float)[:, None]
+    prices = np.empty((n, days))
+    prices[:, :1] = p0
+    prices[:, 1:] = p0 * np.cumprod(1 + returns, axis=1)
+
+    high  = prices * (1 + np.abs(noise[:, 0]))
+    low   = prices * (1 - np.abs(noise[:, 1]))
+    open_ = prices * (1 + noise[:, 2])
+
+    # KRX 가격·거래량은 32비트에 충분히 들어감 → int64 대비 메모리 절반
+    return {
+        "open":   np.rint(open_).astype(np.int32),
+        "high":   np.rint(high).astype(np.int32),
+        "low":    np.rint(low).astype(np.int32),
+        "close":  np.rint(prices).astype(np.int32),
+        "volume": vol_raw.astype(np.uint32),
+    }
+
+
+def _cache_path(days: int, initial_price: float, seed: int) -> str:
+    return os.path.join(_CACHE_DIR, f"sample_v{_SAMPLE_FORMAT}_{seed}_{days}_{initial_price:g}.npz")
+
+
+def _load_columns(days: int, initial_price: float, seed: int) -> Optional[dict]:
+    """메모리 → .cache/*.npz 순으로 캐시 조회 (없으면 None)"""
+    key = (days, initial_price, seed)
+    if key in _COLUMN_CACHE:
+        return _COLUMN_CACHE[key]
+    path = _cache_path(days, initial_price, seed)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as npz:
+        cols = {k: npz[k] for k in npz.files}
+    return _remember(key, cols)
+
+
+def _remember(key: tuple, cols: dict) -> dict:
+    for arr in cols.values():
+        arr.flags.writeable = False
+    _COLUMN_CACHE[key] = cols
+    return cols
+
+
+@functools.lru_cache(maxsize=8)
+def _sample_dates(days: int, today: date) -> tuple:
+    """샘플 데이터 날짜 문자열 (기준일별 1회 생성, 전일까지 days일)"""
+    return tuple(pd.date_range(end=today - timedelta(days=1), periods=days,
+                               freq="D").strftime("%Y%m%d"))
+
+
+def generate_sample_batch(days: int, initial_prices, seeds) -> list:
+    """
+    여러 종목 샘플 데이터 일괄 생성
+    (seed, days, initial_price)별로 메모리·디스크 캐시 → 캐시 미스 종목만 한 번에 생성
+    Returns: 종목별 컬럼 dict 리스트 (입력 순서 유지)
+    """
+    cols = [_load_columns(days, p, s) for p, s in zip(initial_prices, seeds)]
+    miss = [k for k, c in enumerate(cols) if c is None]
+    if miss:
+        fresh = _generate_columns(days,
+                                  [initial_prices[k] for k in miss],
+                                  [seeds[k] for k in miss])
+        for j, k in enumerate(miss):
+            c = {key: arr[j].copy() for key, arr in fresh.items()}
+            try:
+                os.makedirs(_CACHE_DIR, exist_ok=True)
+                np.savez(_cache_path(days, initial_prices[k], seeds[k]), **c)
+            except OSError:
+                pass   # 캐시 저장 실패는 무시 (다음 실행 시 재생성)
+            cols[k] = _remember((days, initial_prices[k], seeds[k]), c)
+
+    dates = np.array(_sample_dates(days, date.today()))
+    return [{"date": dates, **c} for c in cols]
+
+
 def generate_sample_data(days: int = 120, initial_price: float = 70000,
-                          seed: int = 42) -> list:
+                          seed: int = 42) -> dict:
     """
     샘플 주가 데이터 생성 (삼성전자 패턴 시뮬레이션)
     실제 백테스트 시에는 kiwoom.get_daily_ohlcv() 데이터 사용
+    Returns: 컬럼 단위 {"date": arr, "open": arr, ..., "volume": arr} (OHLC int32, 거래량 uint32)
     """
-    np.random.seed(seed)
-    prices = [initial_price]
-    volumes = []
-
-    for i in range(days - 1):
-        # 랜덤워크 + 트렌드
-        trend   = 0.0002
-        returns = np.random.normal(trend, 0.015)
-        prices.append(prices[-1] * (1 + returns))
-        volumes.append(int(np.random.lognormal(15, 0.5)))
-
-    volumes.append(int(np.random.lognormal(15, 0.5)))
-
-    ohlcv = []
-    base_date = datetime.now() - timedelta(days=days)
-    for i, price in enumerate(prices):
-        high  = price * (1 + abs(np.random.normal(0, 0.005)))
-        low   = price * (1 - abs(np.random.normal(0, 0.005)))
-        open_ = price * (1 + np.random.normal(0, 0.003))
-        date  = (base_date + timedelta(days=i)).strftime("%Y%m%d")
-        ohlcv.append({
-            "date":   date,
-            "open":   round(open_),
-            "high":   round(high),
-            "low":    round(low),
-            "close":  round(price),
-            "volume": volumes[i]
-        })
-    return ohlcv
-
+    return generate_sample_batch(days, [initial_price], [seed])[0]
 
-def run_multi_stock_backtest():
-    """여러 종목에 대한 백테스트 실행"""
-    print("\n" + "="*60)
-    print("🔬 키움 자동매매 전략 백테스트")
-    print("="*60)
 
+@functools.lru_cache(maxsize=1)
+def _get_engine() -> BacktestEngine:
+    """워커 프로세스별 전략·엔진 1회 생성 후 재사용 (pickle 불필요)"""
     strategy = MACrossoverStrategy(
         short_period=5, long_period=20,
         rsi_period=14, rsi_oversold=30, rsi_overbought=70
     )
-    engine = BacktestEngine(strategy, initial_capital=1_000_000)
+    return BacktestEngine(strategy, initial_capital=1_000_000)
+
+
+def _run_one(args: tuple) -> dict:
+    """단일 종목 백테스트 (프로세스 풀 워커)"""
+    code, name, data = args
+    return _get_engine().run(data, code=code, name=name)
+
+
+def run_multi_stock_backtest():
+    """여러 종목에 대한 백테스트 실행"""
+    sys.stdout.write("\n" + "="*60 + "\n🔬 키움 자동매매 전략 백테스트\n" + "="*60 + "\n")
 
     stocks = {
         "005930": ("삼성전자",  70000, 42),
@@ -67,33 +160,50 @@ def run_multi_stock_backtest():
         "051910": ("LG화학",    350000, 46),
     }
 
-    results = []
-    for code, (name, price, seed) in stocks.items():
-        data = generate_sample_data(days=120, initial_price=price, seed=seed)
-        result = engine.run(data, code=code, name=name)
-        results.append(result)
-
-        print(f"\n[{code}] {name}")
-        print(f"  수익률  : {result['total_return_pct']:+.2f}%")
-        print(f"  거래횟수: {result['total_trades']}회")
-        print(f"  승률    : {result['win_rate_pct']:.1f}%")
-        print(f"  MDD     : {result['max_drawdown_pct']:.2f}%")
-        print(f"  최종자산: ₩{result['final_capital']:,.0f}")
+    # 종목별 백테스트는 서로 독립 → 프로세스 병렬 실행 (ex.map으로 순서 유지)
+    workers = min(len(stocks), os.cpu_count() or 1)
+    names, prices, seeds = zip(*stocks.values())
+    datasets = generate_sample_batch(120, prices, seeds)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(_run_one, zip(stocks, names, datasets)))
+
+    # 출력은 한 번에 버퍼링해서 기록
+    lines = []
+    for result in results:
+        lines += [
+            f"\n[{result['code']}] {result['name']}",
+            f"  수익률  : {result['total_return_pct']:+.2f}%",
+            f"  거래횟수: {result['total_trades']}회",
+            f"  승률    : {result['win_rate_pct']:.1f}%",
+            f"  MDD     : {result['max_drawdown_pct']:.2f}%",
+            f"  최종자산: ₩{result['final_capital']:,.0f}",
+        ]
 
     # 종합 성과
-    print("\n" + "="*60)
-    print("📊 종합 성과 요약")
-    print("="*60)
-    avg_return = sum(r['total_return_pct'] for r in results) / len(results)
-    avg_win_rate = sum(r['win_rate_pct'] for r in results) / len(results)
-    avg_mdd = sum(r['max_drawdown_pct'] for r in results) / len(results)
-    print(f"  평균 수익률  : {avg_return:+.2f}%")
-    print(f"  평균 승률    : {avg_win_rate:.1f}%")
-    print(f"  평균 MDD     : {avg_mdd:.2f}%")
+    avg_return, avg_win_rate, avg_mdd = np.mean(
+        [[r['total_return_pct'], r['win_rate_pct'], r['max_drawdown_pct']] for r in results],
+        axis=0
+    )
+    lines += [
+        "\n" + "="*60,
+        "📊 종합 성과 요약",
+        "="*60,
+        f"  평균 수익률  : {avg_return:+.2f}%",
+        f"  평균 승률    : {avg_win_rate:.1f}%",
+        f"  평균 MDD     : {avg_mdd:.2f}%",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
     # JSON 저장
-    with open("backtest_results.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    if ORJSON_AVAILABLE:
+        with open("backtest_results.json", "wb") as f:
+            f.write(orjson.dumps(
+                results, default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
+    else:
+        with open("backtest_results.json", "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
     print("\n✅ 결과 저장: backtest_results.json")
 
     return results
@@ -7,30 +7,62 @@
 import os
 from dotenv import load_dotenv
 from dataclasses import dataclass, field
+from datetime import time as dtime
 from typing import List
 
 # .env 파일 로드 (config.py와 같은 폴더)
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
+# ──────────────────────────────────────────────
+# 환경변수 설정 (import 시 1회만 파싱)
+# ──────────────────────────────────────────────
+def _env(key: str, default: str = "", secret: bool = False):
+    return field(default_factory=lambda: os.getenv(key, default), repr=not secret)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """.env / 환경변수 기반 설정 (불변)"""
+    kiwoom_user_id:       str = _env("KIWOOM_USER_ID", "YOUR_ID")
+    kiwoom_password:      str = _env("KIWOOM_PASSWORD", "YOUR_PW", secret=True)
+    kiwoom_cert_password: str = _env("KIWOOM_CERT_PW", "YOUR_CERT_PW", secret=True)
+    account_number:       str = _env("KIWOOM_ACCOUNT", "YOUR_ACCOUNT_NO")
+    account_password:     str = _env("KIWOOM_ACCOUNT_PASSWORD", "0000", secret=True)
+    is_mock_trading:      bool = field(
+        default_factory=lambda: os.getenv("IS_MOCK_TRADING", "True").lower() != "false")
+    server_host:          str = _env("SERVER_HOST", "43.203.181.195")
+    server_port:          int = field(
+        default_factory=lambda: int(os.getenv("SERVER_PORT", "9000")))
+    server_api_key:       str = _env("SERVER_API_KEY", "kiwoom-ast-secret-efdf9d396f5d10b7f4e65834", secret=True)
+    telegram_bot_token:   str = _env("TELEGRAM_BOT_TOKEN", secret=True)
+    telegram_chat_id:     str = _env("TELEGRAM_CHAT_ID")
+
+    @property
+    def server_api_url(self) -> str:
+        return f"http://{self.server_host}:{self.server_port}"
+
+
+SETTINGS = Settings()
+
 # ──────────────────────────────────────────────
 # 키움 API 설정
 # ──────────────────────────────────────────────
-KIWOOM_USER_ID       = os.getenv("KIWOOM_USER_ID", "YOUR_ID")
-KIWOOM_PASSWORD      = os.getenv("KIWOOM_PASSWORD", "YOUR_PW")
-KIWOOM_CERT_PASSWORD = os.getenv("KIWOOM_CERT_PW", "YOUR_CERT_PW")
-ACCOUNT_NUMBER       = os.getenv("KIWOOM_ACCOUNT", "YOUR_ACCOUNT_NO")  # ex) 1234567890
-ACCOUNT_PASSWORD     = os.getenv("KIWOOM_ACCOUNT_PASSWORD", "0000")  # 계좌 주문 비밀번호 (4~6자리)
+KIWOOM_USER_ID       = SETTINGS.kiwoom_user_id
+KIWOOM_PASSWORD      = SETTINGS.kiwoom_password
+KIWOOM_CERT_PASSWORD = SETTINGS.kiwoom_cert_password
+ACCOUNT_NUMBER       = SETTINGS.account_number      # ex) 1234567890
+ACCOUNT_PASSWORD     = SETTINGS.account_password    # 계좌 주문 비밀번호 (4~6자리)
 
 # 모의투자 여부 (True=모의, False=실전)
-IS_MOCK_TRADING      = os.getenv("IS_MOCK_TRADING", "True").lower() != "false"
+IS_MOCK_TRADING      = SETTINGS.is_mock_trading
 
 # ──────────────────────────────────────────────
 # 서버 설정 (AWS - 외부 포트 9000)
 # ──────────────────────────────────────────────
-SERVER_HOST        = os.getenv("SERVER_HOST",    "43.203.181.195")
-SERVER_PORT        = 9000   # 외부 포트: 9000 (Docker: 9000->8000 내부)
-SERVER_API_URL     = f"http://{SERVER_HOST}:{SERVER_PORT}"
-SERVER_API_KEY     = os.getenv("SERVER_API_KEY", "kiwoom-ast-secret-efdf9d396f5d10b7f4e65834")
+SERVER_HOST        = SETTINGS.server_host
+SERVER_PORT        = SETTINGS.server_port   # 외부 포트: 9000 (Docker: 9000->8000 내부)
+SERVER_API_URL     = SETTINGS.server_api_url
+SERVER_API_KEY     = SETTINGS.server_api_key
 
 # ──────────────────────────────────────────────
 # 투자 자본 설정 (100만원)
@@ -55,7 +87,7 @@ VOLUME_MA_PERIOD   = 20          # 거래량 이동평균 기간
 # ──────────────────────────────────────────────
 # 매매 대상 종목 (코스피 우량주)
 # ──────────────────────────────────────────────
-WATCHLIST = [
+WATCHLIST = (
     "005930",   # 삼성전자    (176,500원) → 40%기준 2주 가능
     "035420",   # NAVER       (213,000원) → 40%기준 1주 가능
     "035720",   # 카카오      ( 48,850원) → 40%기준 8주 가능
@@ -67,7 +99,8 @@ WATCHLIST = [
     # "000660",  # SK하이닉스  (873,000원) → 불가
     # "005380",  # 현대차      (511,000원) → 불가
     # "207940",  # 삼성바이오  (1,542,000원) → 불가
-]
+)
+WATCHLIST_SET = frozenset(WATCHLIST)   # 멤버십 검사용
 
 # ──────────────────────────────────────────────
 # 시장 시간 설정
@@ -77,6 +110,12 @@ MARKET_CLOSE_TIME  = "15:30"
 PRE_MARKET_TIME    = "08:50"     # 장 전 준비
 AFTER_MARKET_TIME  = "15:40"    # 장 후 정리
 
+# datetime.time 변환본 (매 틱마다 문자열 파싱 방지)
+MARKET_OPEN        = dtime.fromisoformat(MARKET_OPEN_TIME)
+MARKET_CLOSE       = dtime.fromisoformat(MARKET_CLOSE_TIME)
+PRE_MARKET         = dtime.fromisoformat(PRE_MARKET_TIME)
+AFTER_MARKET       = dtime.fromisoformat(AFTER_MARKET_TIME)
+
 # ──────────────────────────────────────────────
 # 로깅 설정
 # ──────────────────────────────────────────────
@@ -88,6 +127,6 @@ LOG_BACKUP_COUNT   = 5
 # ──────────────────────────────────────────────
 # 알림 설정 (선택)
 # ──────────────────────────────────────────────
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-TELEGRAM_CHAT_ID   = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_BOT_TOKEN = SETTINGS.telegram_bot_token
+TELEGRAM_CHAT_ID   = SETTINGS.telegram_chat_id
 ENABLE_TELEGRAM    = bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)
@@ -7,9 +7,14 @@
 import sys
 import time
 import logging
+import threading
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 from contextlib import contextmanager
@@ -46,6 +51,17 @@ def _safe_str(val) -> str:
     except Exception:
         return s
 
+# opt10081 출력 컬럼 → OHLCV 키
+_OHLCV_COLUMNS = {
+    "open":   "시가",
+    "high":   "고가",
+    "low":    "저가",
+    "close":  "현재가",
+    "volume": "거래량",
+}
+
+_KWFID_MAX_CODES = 100   # OPTKWFID 1회 조회 가능 종목 수
+
 # Windows 환경에서만 pykiwoom 임포트
 try:
     from pykiwoom.kiwoom import Kiwoom
@@ -55,6 +71,29 @@ except ImportError:
     logger.warning("pykiwoom 미설치 - 시뮬레이션 모드로 실행됩니다.")
 
 
+class _RateLimiter:
+    """
+    조회(TR) 호출 제한: 최근 period초 안에 최대 max_calls회
+    고정 sleep 대신 한도에 걸렸을 때만 남은 시간만큼 대기
+    """
+
+    def __init__(self, max_calls: int = 5, period: float = 1.0):
+        self.max_calls = max_calls
+        self.period    = period
+        self._calls: deque = deque()
+        self._lock     = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.period:
+                self._calls.popleft()
+            if len(self._calls) >= self.max_calls:
+                time.sleep(self.period - (now - self._calls[0]))
+                self._calls.popleft()
+            self._calls.append(time.monotonic())
+
+
 class KiwoomWrapper:
     """
     키움 OpenAPI 래퍼 클래스
@@ -69,6 +108,7 @@ class KiwoomWrapper:
         self.is_connected = False
         self.account_number = ""
         self._login_event = None
+        self._tr_limiter  = _RateLimiter(max_calls=5, period=1.0)   # 키움 조회 제한 (초당 5회)
 
     # ──────────────────────────────────────────────
     # 연결 및 로그인
@@ -147,6 +187,7 @@ class KiwoomWrapper:
             self.kiwoom.SetInputValue("비밀번호", "")
             self.kiwoom.SetInputValue("비밀번호입력매체구분", "00")
             self.kiwoom.SetInputValue("조회구분", "2")
+            self._tr_limiter.wait()
             self.kiwoom.CommRqData("예수금상세현황조회", "opw00001", 0, "0101", block=True)
 
             balance = {
@@ -167,21 +208,24 @@ class KiwoomWrapper:
 
         try:
             # OPW00018: 계좌평가잔고내역
+            tr, rq = "opw00018", "계좌평가잔고내역조회"
             self.kiwoom.SetInputValue("계좌번호", self.account_number)
             self.kiwoom.SetInputValue("비밀번호", "")
             self.kiwoom.SetInputValue("비밀번호입력매체구분", "00")
             self.kiwoom.SetInputValue("조회구분", "1")
-            self.kiwoom.CommRqData("계좌평가잔고내역조회", "opw00018", 0, "0101", block=True)
+            self._tr_limiter.wait()
+            self.kiwoom.CommRqData(rq, tr, 0, "0101", block=True)
 
             holdings = []
-            rows = self.kiwoom.GetRepeatCnt("opw00018", "계좌평가잔고내역조회")
+            gcd  = self.kiwoom.GetCommData
+            rows = self.kiwoom.GetRepeatCnt(tr, rq)
             for i in range(rows):
-                code     = self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "종목번호").strip().replace('A', '')
-                name     = self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "종목명").strip()
-                qty      = int(self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "보유수량").strip() or 0)
-                avg_price = int(self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "매입단가").strip() or 0)
-                cur_price = int(self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "현재가").strip() or 0)
-                pnl_pct   = float(self.kiwoom.GetCommData("opw00018", "계좌평가잔고내역조회", i, "수익률(%)").strip() or 0)
+                code      = gcd(tr, rq, i, "종목번호").strip().replace('A', '')
+                name      = gcd(tr, rq, i, "종목명").strip()
+                qty       = int(gcd(tr, rq, i, "보유수량").strip() or 0)
+                avg_price = int(gcd(tr, rq, i, "매입단가").strip() or 0)
+                cur_price = int(gcd(tr, rq, i, "현재가").strip() or 0)
+                pnl_pct   = float(gcd(tr, rq, i, "수익률(%)").strip() or 0)
 
                 if code and qty > 0:
                     holdings.append({
@@ -207,6 +251,7 @@ class KiwoomWrapper:
             return []
 
         try:
+            self._tr_limiter.wait()
             with _suppress_print():
                 df = self.kiwoom.block_request(
                     "opt10081",
@@ -221,23 +266,17 @@ class KiwoomWrapper:
                 logger.warning(f"OHLCV 데이터 없음 ({code})")
                 return []
 
-            ohlcv_list = []
-            for _, row in df.iterrows():
-                try:
-                    ohlcv_list.append({
-                        "date":   str(row.get("일자", "")).strip(),
-                        "open":   abs(int(str(row.get("시가",   0)).strip() or 0)),
-                        "high":   abs(int(str(row.get("고가",   0)).strip() or 0)),
-                        "low":    abs(int(str(row.get("저가",   0)).strip() or 0)),
-                        "close":  abs(int(str(row.get("현재가", 0)).strip() or 0)),
-                        "volume": abs(int(str(row.get("거래량", 0)).strip() or 0)),
-                    })
-                except (ValueError, TypeError):
-                    continue
+            # 컬럼 단위 일괄 파싱 (행별 iterrows 제거)
+            ohlcv = pd.DataFrame({"date": df["일자"].astype(str).str.strip()})
+            for key, col in _OHLCV_COLUMNS.items():
+                ohlcv[key] = pd.to_numeric(
+                    df[col].astype(str).str.strip().replace("", "0"), errors="coerce")
+            ohlcv = ohlcv.dropna()
+            num_cols = list(_OHLCV_COLUMNS)
+            ohlcv[num_cols] = ohlcv[num_cols].abs().astype(np.int64)
 
-            ohlcv_list = [x for x in ohlcv_list if x["close"] > 0]
-            ohlcv_list = sorted(ohlcv_list, key=lambda x: x["date"])
-            return ohlcv_list[-count:]
+            ohlcv = ohlcv[ohlcv["close"] > 0].sort_values("date").tail(count)
+            return ohlcv.to_dict("records")
 
         except Exception as e:
             logger.error(f"일봉 조회 오류 ({code}): {e}")
@@ -249,6 +288,7 @@ class KiwoomWrapper:
             return {}
 
         try:
+            self._tr_limiter.wait()
             with _suppress_print():
                 df = self.kiwoom.block_request(
                     "opt10001",
@@ -271,6 +311,79 @@ class KiwoomWrapper:
             logger.error(f"현재가 조회 오류 ({code}): {e}")
             return {}
 
+    def get_current_prices(self, codes: List[str]) -> Dict[str, Dict]:
+        """
+        복수 종목 현재가 일괄 조회 (OPTKWFID 관심종목정보, TR 1회당 최대 100종목)
+        반환: {종목코드: {"code", "name", "price", "change_pct"}} (조회 실패 종목은 제외)
+        응답 시간 초과·누락 종목과 CommKwRqData 미지원 pykiwoom 버전은 종목별 opt10001로 대체
+        """
+        if not self.is_connected or not codes:
+            return {}
+        if not (hasattr(self.kiwoom, "CommKwRqData") and hasattr(self.kiwoom, "ocx")):
+            return {c: info for c in codes if (info := self.get_current_price(c))}
+
+        quotes = {}
+        for start in range(0, len(codes), _KWFID_MAX_CODES):
+            chunk = codes[start:start + _KWFID_MAX_CODES]
+            rows  = self._request_kwfid(chunk) or {}
+            for code in chunk:
+                info = rows.get(code) or self.get_current_price(code)
+                if info:
+                    quotes[code] = info
+        return quotes
+
+    def _request_kwfid(self, chunk: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        OPTKWFID 1회 요청 → {종목코드: 시세}
+        행은 OnReceiveTrData 콜백 안에서 읽음 (콜백 밖 GetCommData는 유효하지 않음)
+        실패·시간 초과 시 None
+        """
+        tr, rq = "OPTKWFID", "관심종목정보요청"
+        rows   = {}
+        done   = []
+
+        def on_receive_tr(screen, rqname, trcode, record, next):
+            if rqname != rq:
+                return
+            try:
+                gcd = self.kiwoom.GetCommData
+                for i in range(self.kiwoom.GetRepeatCnt(trcode, rqname)):
+                    code  = gcd(trcode, rqname, i, "종목코드").strip()
+                    price = abs(int(gcd(trcode, rqname, i, "현재가").strip() or 0))
+                    if not code or price <= 0:
+                        continue
+                    rows[code] = {
+                        "code":       code,
+                        "name":       _safe_str(gcd(trcode, rqname, i, "종목명")),
+                        "price":      price,
+                        "change_pct": float(gcd(trcode, rqname, i, "등락율").strip() or 0),
+                    }
+            except Exception as e:
+                logger.error(f"복수 현재가 수신 처리 오류: {e}")
+            done.append(True)
+
+        signal = self.kiwoom.ocx.OnReceiveTrData
+        try:
+            import pythoncom
+            signal.connect(on_receive_tr)
+            try:
+                self._tr_limiter.wait()
+                self.kiwoom.CommKwRqData(";".join(chunk), 0, len(chunk), 0, rq, "0102")
+                deadline = time.monotonic() + 5.0
+                while not done and time.monotonic() < deadline:
+                    pythoncom.PumpWaitingMessages()
+                    time.sleep(0.005)
+            finally:
+                signal.disconnect(on_receive_tr)
+        except Exception as e:
+            logger.error(f"복수 현재가 조회 오류: {e} → 종목별 조회로 대체")
+            return None
+
+        if not done:
+            logger.warning(f"복수 현재가 응답 시간 초과 ({len(chunk)}종목) → 종목별 조회로 대체")
+            return None
+        return rows
+
     # ──────────────────────────────────────────────
     # 주문 처리
     # ──────────────────────────────────────────────
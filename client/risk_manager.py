@@ -5,10 +5,17 @@
 # ============================================================
 
 import logging
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
 from datetime import datetime, date
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, field
 
+import numpy as np
+
+from _njit import njit
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,18 +29,66 @@ class RiskConfig:
     daily_loss_limit:     float = 0.03       # 일일 최대 손실 3%
     max_drawdown_limit:   float = 0.10       # 최대 낙폭 10%
     min_cash_ratio:       float = 0.20       # 최소 현금 비중 20%
+    trade_log_capacity:   int   = 10_000     # 거래 로그 보관 건수 (초과 시 오래된 것부터 폐기)
 
+    # 파생 배율 (손절가 = 가격×_stop_mul, 익절가 = 가격×_take_mul)
+    _stop_mul: np.float64 = field(init=False, repr=False)
+    _take_mul: np.float64 = field(init=False, repr=False)
 
-@dataclass
-class Position:
-    code:         str
-    name:         str
-    quantity:     int
-    avg_price:    float
-    current_price: float = 0
-    entry_time:   str = ""
-    stop_price:   float = 0     # 손절가
-    target_price: float = 0     # 익절가
+    def __post_init__(self):
+        self._stop_mul = np.float64(1 - self.stop_loss_ratio)
+        self._take_mul = np.float64(1 + self.take_profit_ratio)
+
+
+def _price(v) -> float:
+    """KRX 가격은 정수 → 정수값은 int로 반환 (로그·JSON 형식 유지)"""
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+# check_stop_conditions 결과 코드
+_HOLD, _STOP_HIT, _TAKE_HIT, _TRAIL_RAISED = 0, 1, 2, 3
+
+
+@njit("void(f8[:], f8[:], i8[:], i8[:], u1[:])", cache=True)
+def _stop_kernel(current, avg, stop, target, mask):
+    """
+    손절/익절/트레일링 스탑 일괄 판정 (stop 배열은 제자리 갱신)
+    mask: 포지션별 결과 코드 출력 버퍼 (uint8, 길이 ≥ 포지션 수)
+    """
+    n = current.shape[0]
+    for i in range(n):
+        mask[i] = _HOLD
+        cur = current[i]
+        if cur <= 0:
+            continue
+        if cur <= stop[i]:
+            mask[i] = _STOP_HIT
+        elif cur >= target[i]:
+            mask[i] = _TAKE_HIT
+        else:
+            # 트레일링 스탑: 수익률 2% 이상이면 현재가 -2%로 손절가 상향
+            pnl_pct = (cur / avg[i] - 1) * 100 if avg[i] > 0 else 0.0
+            if pnl_pct >= 2.0:
+                trail = cur * 0.98
+                if trail > stop[i]:
+                    stop[i] = np.rint(trail)
+                    mask[i] = _TRAIL_RAISED
+
+
+class Position(NamedTuple):
+    """
+    보유 포지션 스냅샷 (PositionTable 행을 읽은 시점의 값, 읽기 전용)
+    값 변경은 PositionTable 컬럼 / RiskManager 메서드로만 수행
+    """
+    code:          str
+    name:          str
+    quantity:      int
+    avg_price:     float
+    current_price: float
+    entry_time:    str
+    stop_price:    int     # 손절가
+    target_price:  int     # 익절가
 
     @property
     def market_value(self) -> float:
@@ -52,6 +107,84 @@ class Position:
         return (self.current_price / self.avg_price - 1) * 100 if self.avg_price > 0 else 0
 
 
+class PositionTable(Mapping):
+    """
+    보유 포지션 컬럼 테이블 (SoA)
+    - 숫자 필드는 행 단위 numpy 배열, 활성 행은 [:len] 구간 (등록 순서 유지)
+    - dict처럼 종목코드 → Position 스냅샷으로 조회
+    """
+
+    def __init__(self, capacity: int = 8):
+        capacity = max(capacity, 1)
+        self.quantity      = np.zeros(capacity, dtype=np.int64)
+        self.avg_price     = np.zeros(capacity, dtype=np.float64)
+        self.current_price = np.zeros(capacity, dtype=np.float64)
+        self.stop_price    = np.zeros(capacity, dtype=np.int64)
+        self.target_price  = np.zeros(capacity, dtype=np.int64)
+        self.src_row       = np.full(capacity, -1, dtype=np.intp)   # 외부 시세 배열 행 (-1: 미연결)
+        self.codes:       List[str] = []
+        self.names:       List[str] = []
+        self.entry_times: List[str] = []
+        self._idx: Dict[str, int] = {}
+
+    def _columns(self) -> tuple:
+        return (self.quantity, self.avg_price, self.current_price,
+                self.stop_price, self.target_price, self.src_row)
+
+    def add(self, code: str, name: str, quantity: int, avg_price: float,
+            stop_price: int, target_price: int, entry_time: str = "", src_row: int = -1):
+        """행 추가 (용량 부족 시 2배 확장)"""
+        n = len(self.codes)
+        if n == self.quantity.shape[0]:
+            for attr in ("quantity", "avg_price", "current_price", "stop_price", "target_price", "src_row"):
+                old = getattr(self, attr)
+                grown = np.full(2 * n, -1 if attr == "src_row" else 0, dtype=old.dtype)
+                grown[:n] = old
+                setattr(self, attr, grown)
+        self.quantity[n]      = quantity
+        self.avg_price[n]     = avg_price
+        self.current_price[n] = avg_price
+        self.stop_price[n]    = stop_price
+        self.target_price[n]  = target_price
+        self.src_row[n]       = src_row
+        self.codes.append(code)
+        self.names.append(name)
+        self.entry_times.append(entry_time)
+        self._idx[code] = n
+
+    def remove(self, code: str):
+        """행 삭제 (뒤쪽 행을 한 칸씩 당겨 등록 순서 유지)"""
+        row = self._idx.pop(code)
+        n   = len(self.codes)
+        for col in self._columns():
+            col[row:n - 1] = col[row + 1:n]
+        del self.codes[row], self.names[row], self.entry_times[row]
+        for c in self.codes[row:]:
+            self._idx[c] -= 1
+
+    def market_value_total(self) -> float:
+        n = len(self.codes)
+        return _price(np.dot(self.quantity[:n], self.current_price[:n]))
+
+    # ── Mapping 인터페이스 ──
+    def __getitem__(self, code: str) -> Position:
+        r = self._idx[code]
+        return Position(
+            code, self.names[r], int(self.quantity[r]),
+            _price(self.avg_price[r]), _price(self.current_price[r]),
+            self.entry_times[r], int(self.stop_price[r]), int(self.target_price[r])
+        )
+
+    def __contains__(self, code) -> bool:
+        return code in self._idx
+
+    def __iter__(self):
+        return iter(list(self.codes))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
 class RiskManager:
     """
     리스크 관리자
@@ -63,23 +196,38 @@ class RiskManager:
 
     def __init__(self, config: RiskConfig = None):
         self.config     = config or RiskConfig()
-        self.positions: Dict[str, Position] = {}
+        self.positions  = PositionTable(self.config.max_total_positions)
         self.cash       = self.config.initial_capital
         self.daily_pnl  = 0.0
         self.total_pnl  = 0.0
-        self.trade_log: List[Dict] = []
+        self.trade_log: deque = deque(maxlen=self.config.trade_log_capacity)
         self._today     = date.today()
+        self._position_value = 0.0     # Σ 수량×현재가 (open/close/update_prices에서 증분 갱신)
+        self._cycle_ts  = ""           # 현재 사이클 시각 (비어 있으면 매번 now())
+        self._src_index: Dict[str, int] = {}   # 종목코드 → 외부 시세 배열 행 (bind_price_source)
+
+        # check_stop_conditions 재사용 버퍼
+        self._stop_mask = np.zeros(self.config.max_total_positions, dtype=np.uint8)
+        self._to_close: List[Tuple[str, float, str]] = []
+        self._stops_dirty = False      # 마지막 손절 검사 이후 현재가·포지션 변동 여부
+
+        # 청산 성과 누적 (close_position에서 갱신)
+        self._sells_count  = 0
+        self._wins_count   = 0
+        self._losses_count = 0
+        self._wins_sum     = 0.0
+        self._losses_sum   = 0.0
 
     # ──────────────────────────────────────────────
     # 자산 현황
     # ──────────────────────────────────────────────
     @property
     def portfolio_value(self) -> float:
-        return self.cash + sum(p.market_value for p in self.positions.values())
+        return self.cash + self.position_value
 
     @property
     def position_value(self) -> float:
-        return sum(p.market_value for p in self.positions.values())
+        return _price(self._position_value)
 
     @property
     def cash_ratio(self) -> float:
@@ -95,19 +243,47 @@ class RiskManager:
             "total_pnl_pct":      round(self.total_pnl / self.config.initial_capital * 100, 2),
             "daily_pnl":          round(self.daily_pnl, 0),
             "position_count":     len(self.positions),
-            "holdings":           [self._position_to_dict(p) for p in self.positions.values()]
+            "holdings":           self._holdings_records()
         }
 
-    def _position_to_dict(self, p: Position) -> Dict:
-        return {
-            "code": p.code, "name": p.name,
-            "quantity": p.quantity, "avg_price": p.avg_price,
-            "current_price": p.current_price,
-            "market_value": round(p.market_value, 0),
-            "unrealized_pnl": round(p.unrealized_pnl, 0),
-            "unrealized_pnl_pct": round(p.unrealized_pnl_pct, 2),
-            "stop_price": p.stop_price, "target_price": p.target_price
-        }
+    def _holdings_records(self) -> List[Dict]:
+        """보유 종목 목록 (컬럼 단위로 한 번에 계산 후 행 dict로 조립)"""
+        t = self.positions
+        n = len(t)
+        if n == 0:
+            return []
+        qty, avg, cur = t.quantity[:n], t.avg_price[:n], t.current_price[:n]
+        market = qty * cur
+        pnl    = market - qty * avg
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pnl_pct = np.where(avg > 0, (cur / avg - 1) * 100, 0.0)
+
+        # KRX 가격은 정수 → 정수 컬럼은 int로 내보내 JSON 형식 유지
+        integral = np.array_equal(cur, np.rint(cur)) and np.array_equal(avg, np.rint(avg))
+        if integral:
+            market_l = market.astype(np.int64).tolist()
+            pnl_l    = pnl.astype(np.int64).tolist()
+        else:
+            market_l = np.round(market).tolist()
+            pnl_l    = np.round(pnl).tolist()
+        avg_l = [_price(v) for v in avg.tolist()]
+        cur_l = [_price(v) for v in cur.tolist()]
+
+        return [
+            {
+                "code": code, "name": name,
+                "quantity": q, "avg_price": a,
+                "current_price": c,
+                "market_value": mv,
+                "unrealized_pnl": pl,
+                "unrealized_pnl_pct": round(pp, 2),
+                "stop_price": sp, "target_price": tp
+            }
+            for code, name, q, a, c, mv, pl, pp, sp, tp in zip(
+                t.codes, t.names, qty.tolist(), avg_l, cur_l, market_l, pnl_l,
+                pnl_pct.tolist(), t.stop_price[:n].tolist(), t.target_price[:n].tolist()
+            )
+        ]
 
     # ──────────────────────────────────────────────
     # 매수 가능 여부 및 수량 계산
@@ -165,15 +341,16 @@ class RiskManager:
             return False
 
         self.cash -= cost
-        stop_price   = round(price * (1 - self.config.stop_loss_ratio))
-        target_price = round(price * (1 + self.config.take_profit_ratio))
-
-        self.positions[code] = Position(
-            code=code, name=name, quantity=quantity,
-            avg_price=price, current_price=price,
-            entry_time=datetime.now().isoformat(),
-            stop_price=stop_price, target_price=target_price
+        self._position_value += cost
+        stop_price   = round(price * self.config._stop_mul)
+        target_price = round(price * self.config._take_mul)
+
+        self.positions.add(
+            code, name, quantity, price,
+            stop_price=stop_price, target_price=target_price,
+            entry_time=self._now_iso(), src_row=self._src_index.get(code, -1)
         )
+        self._stops_dirty = True
 
         logger.info(f"📈 포지션 등록 | {name}({code}) {quantity}주 @{price:,}원 "
                     f"| 손절={stop_price:,} | 익절={target_price:,}")
@@ -194,6 +371,14 @@ class RiskManager:
         self.daily_pnl += pnl
         self.total_pnl += pnl
 
+        self._sells_count += 1
+        if pnl > 0:
+            self._wins_count += 1
+            self._wins_sum   += pnl
+        else:
+            self._losses_count += 1
+            self._losses_sum   += pnl
+
         result = {
             "code": code, "name": pos.name,
             "quantity": pos.quantity,
@@ -207,47 +392,111 @@ class RiskManager:
         logger.info(f"📉 포지션 청산 | {pos.name}({code}) {pos.quantity}주 @{price:,}원 "
                     f"| PnL={pnl:+,.0f}원 ({pnl_pct:+.2f}%) | 사유: {reason}")
         self._log_trade("SELL", code, pos.name, pos.quantity, price, pnl=pnl, reason=reason)
-        del self.positions[code]
+        self._position_value -= pos.market_value
+        self.positions.remove(code)
         return result
 
-    def update_prices(self, price_data: Dict[str, float]):
-        """현재가 업데이트"""
-        for code, price in price_data.items():
-            if code in self.positions:
-                self.positions[code].current_price = price
+    def update_prices(self, price_data: Union[Dict[str, float], Sequence[str]],
+                      prices: Optional[np.ndarray] = None):
+        """
+        현재가 업데이트
+        - update_prices({"005930": 71000, ...})
+        - update_prices(codes, prices): 종목코드 배열 + 같은 순서의 시세 배열
+          (미보유 종목·0 이하·NaN 시세는 무시)
+        """
+        t = self.positions
+        if prices is None:
+            held = t._idx.keys() & price_data.keys()
+            if not held:
+                return
+            idxs = np.fromiter((t._idx[c] for c in held), dtype=np.intp, count=len(held))
+            new  = np.fromiter((price_data[c] for c in held), dtype=np.float64, count=len(held))
+        else:
+            idxs  = np.fromiter((t._idx.get(c, -1) for c in price_data), dtype=np.intp,
+                                count=len(price_data))
+            new   = np.asarray(prices, dtype=np.float64)
+            valid = (idxs >= 0) & (new > 0)
+            if not valid.all():
+                idxs, new = idxs[valid], new[valid]
+            if idxs.shape[0] == 0:
+                return
+        old  = t.current_price[idxs]
+        if np.array_equal(new, old):
+            return
+        self._position_value += float(((new - old) * t.quantity[idxs]).sum())
+        t.current_price[idxs] = new
+        self._stops_dirty = True
+
+    def bind_price_source(self, codes: Sequence[str]):
+        """외부 시세 배열의 종목 순서 등록 (update_prices_array / advance에서 사용)"""
+        self._src_index = {code: i for i, code in enumerate(codes)}
+        t = self.positions
+        for r, code in enumerate(t.codes):
+            t.src_row[r] = self._src_index.get(code, -1)
+
+    def update_prices_array(self, prices: np.ndarray):
+        """
+        현재가 업데이트 (bind_price_source 순서의 시세 배열, dict 변환 없음)
+        보유 행의 src_row로 한 번에 gather
+        """
+        t   = self.positions
+        n   = len(t)
+        src = t.src_row[:n]
+        if n == 0:
+            return
+        if (src < 0).any():
+            rows = np.flatnonzero(src >= 0)
+            src  = src[rows]
+        else:
+            rows = slice(0, n)
+        new = prices[src].astype(np.float64)
+        old = t.current_price[rows]
+        if np.array_equal(new, old):
+            return
+        self._position_value += float(((new - old) * t.quantity[rows]).sum())
+        t.current_price[rows] = new
+        self._stops_dirty = True
+
+    def advance(self, prices: np.ndarray) -> List[Tuple[str, float, str]]:
+        """시세 배열 반영 + 손절·익절 판정 (사이클 1회 호출)"""
+        self.update_prices_array(prices)
+        return self.check_stop_conditions()
 
     # ──────────────────────────────────────────────
     # 손절·익절 자동 체크
     # ──────────────────────────────────────────────
-    def check_stop_conditions(self) -> List[Dict]:
+    def check_stop_conditions(self) -> List[Tuple[str, float, str]]:
         """
         모든 포지션에 대해 손절/익절 조건 검사
-        Returns: 청산해야 할 포지션 목록
+        Returns: 청산해야 할 (종목코드, 가격, 사유) 목록
+                 (내부 버퍼 재사용 → 다음 호출 전까지만 유효)
         """
-        to_close = []
-        for code, pos in self.positions.items():
-            if pos.current_price <= 0:
+        to_close = self._to_close
+        to_close.clear()
+        if not self._stops_dirty:       # 변동 없음 → 이전 판정 그대로 (청산 대상 없음)
+            return to_close
+
+        t   = self.positions
+        n   = len(t)
+        cur = t.current_price[:n]
+        if self._stop_mask.shape[0] < n:
+            self._stop_mask = np.zeros(t.quantity.shape[0], dtype=np.uint8)
+        mask = self._stop_mask[:n]
+        _stop_kernel(cur, t.avg_price[:n], t.stop_price[:n], t.target_price[:n], mask)
+
+        for i in np.flatnonzero(mask):
+            m = mask[i]
+            if m == _TRAIL_RAISED:
+                logger.debug(f"트레일링 스탑 상향: {t.names[i]} → {int(t.stop_price[i]):,}원")
                 continue
-
-            # 손절
-            if pos.current_price <= pos.stop_price:
-                to_close.append({
-                    "code": code, "price": pos.current_price,
-                    "reason": f"손절({pos.stop_price:,}원 도달)"
-                })
-            # 익절
-            elif pos.current_price >= pos.target_price:
-                to_close.append({
-                    "code": code, "price": pos.current_price,
-                    "reason": f"익절({pos.target_price:,}원 도달)"
-                })
-            # 트레일링 스탑: 고점 대비 2% 이상 하락 시
-            elif pos.unrealized_pnl_pct >= 2.0:
-                trail_stop = pos.current_price * 0.98
-                if trail_stop > pos.stop_price:
-                    pos.stop_price = round(trail_stop)
-                    logger.debug(f"트레일링 스탑 상향: {pos.name} → {pos.stop_price:,}원")
-
+            if m == _STOP_HIT:
+                reason = f"손절({int(t.stop_price[i]):,}원 도달)"
+            else:
+                reason = f"익절({int(t.target_price[i]):,}원 도달)"
+            to_close.append((t.codes[i], _price(cur[i]), reason))
+
+        # 청산 대상이 남아 있으면 (주문 실패 등) 다음 호출에서 다시 판정
+        self._stops_dirty = bool(to_close)
         return to_close
 
     # ──────────────────────────────────────────────
@@ -262,10 +511,17 @@ class RiskManager:
     # ──────────────────────────────────────────────
     # 거래 로그
     # ──────────────────────────────────────────────
+    def begin_cycle(self, ts: str = ""):
+        """사이클 시작 시각 고정 (해당 사이클의 체결·로그가 같은 타임스탬프 공유)"""
+        self._cycle_ts = ts or datetime.now().isoformat()
+
+    def _now_iso(self) -> str:
+        return self._cycle_ts or datetime.now().isoformat()
+
     def _log_trade(self, trade_type: str, code: str, name: str,
                    quantity: int, price: float, pnl: float = 0, reason: str = ""):
         self.trade_log.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._now_iso(),
             "type":      trade_type,
             "code":      code,
             "name":      name,
@@ -278,25 +534,22 @@ class RiskManager:
         })
 
     def get_trade_log(self, limit: int = 50) -> List[Dict]:
-        return self.trade_log[-limit:]
+        # 뒤에서부터 limit건만 순회 (O(limit))
+        return list(islice(reversed(self.trade_log), limit))[::-1]
 
     def get_performance_stats(self) -> Dict:
         """성과 통계"""
-        sells = [t for t in self.trade_log if t["type"] == "SELL"]
-        if not sells:
+        n = self._sells_count
+        if not n:
             return {"message": "아직 청산 거래 없음"}
 
-        pnls    = [t["pnl"] for t in sells]
-        wins    = [p for p in pnls if p > 0]
-        losses  = [p for p in pnls if p <= 0]
-
-        win_rate    = len(wins) / len(pnls) * 100 if pnls else 0
-        avg_win     = sum(wins) / len(wins) if wins else 0
-        avg_loss    = sum(losses) / len(losses) if losses else 0
-        profit_factor = abs(sum(wins) / sum(losses)) if losses and sum(losses) != 0 else float('inf')
+        win_rate    = self._wins_count / n * 100
+        avg_win     = self._wins_sum / self._wins_count if self._wins_count else 0
+        avg_loss    = self._losses_sum / self._losses_count if self._losses_count else 0
+        profit_factor = abs(self._wins_sum / self._losses_sum) if self._losses_sum != 0 else float('inf')
 
         return {
-            "total_trades":    len(sells),
+            "total_trades":    n,
             "win_rate_pct":    round(win_rate, 1),
             "avg_win":         round(avg_win, 0),
             "avg_loss":        round(avg_loss, 0),
@@ -12,21 +12,37 @@
 """
 
 import time
+import gzip
+import json
 import logging
-import random
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 import numpy as np
 from strategy import MACrossoverStrategy, Signal, TradeSignal
 from risk_manager import RiskManager, RiskConfig
+from _njit import njit
 import config
 
+# orjson 설치 시 서버 페이로드 직렬화에 사용 (없으면 표준 json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+# 서버 전송용 세션 (TCP 연결 재사용)
+_session = requests.Session()
+_session.mount("http://",  HTTPAdapter(pool_connections=1, pool_maxsize=2))
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
 
 MOCK_STOCKS = {
     "005930": {"name": "삼성전자",  "price": 70000,  "volatility": 0.02},
@@ -36,62 +52,140 @@ MOCK_STOCKS = {
     "051910": {"name": "LG화학",   "price": 350000, "volatility": 0.028},
 }
 
+CYCLE_INTERVAL = 5     # 시뮬레이션 사이클 주기 (초)
+
+_BUY_SIGNALS  = frozenset((Signal.BUY, Signal.STRONG_BUY))
+_SELL_SIGNALS = frozenset((Signal.SELL, Signal.STRONG_SELL))
+
+
+@njit("void(i8[:], f8[:], i8[:, :], i8[:, :], i8[:, :], i8[:, :], i8, b1)", cache=True)
+def _tick_kernel(prices, noise, open_, high, low, close, i, new_bar):
+    """종목별 1틱 가격 갱신 + i번째 봉 OHLC 반영 (in-place)"""
+    for k in range(prices.shape[0]):
+        p = np.rint(prices[k] * (1.0 + noise[k]))
+        prices[k] = p
+        if new_bar:
+            open_[k, i] = p
+            high[k, i]  = p
+            low[k, i]   = p
+        else:
+            if p > high[k, i]:
+                high[k, i] = p
+            if p < low[k, i]:
+                low[k, i] = p
+        close[k, i] = p
+
 
 class MockPriceGenerator:
-    """모의 시세 생성기"""
+    """
+    모의 시세 생성기
+    히스토리는 필드별 (종목수, 버퍼크기) 배열에 컬럼 단위(SoA)로 저장
+    """
+
+    BUFFER_SIZE = 256   # 종목당 보관 봉 수 (가득 차면 오래된 절반 폐기)
+    PRICE_EPS   = 1e-4  # 이 비율 이하 가격 변화는 "변동 없음"으로 간주
 
     def __init__(self):
-        self.prices = {code: info["price"] for code, info in MOCK_STOCKS.items()}
-        self.histories: dict = {code: [] for code in MOCK_STOCKS}
-        self._init_histories()
+        self.codes = tuple(MOCK_STOCKS)
+        self._row  = {code: i for i, code in enumerate(self.codes)}
+        self._tick_vol = np.array([MOCK_STOCKS[c]["volatility"] / 10 for c in self.codes])
+        self._rng  = np.random.default_rng()    # 모든 난수는 이 Generator 하나로 벡터 생성
+
+        n, buf = len(self.codes), self.BUFFER_SIZE
+        self.open   = np.zeros((n, buf), dtype=np.int64)
+        self.high   = np.zeros((n, buf), dtype=np.int64)
+        self.low    = np.zeros((n, buf), dtype=np.int64)
+        self.close  = np.zeros((n, buf), dtype=np.int64)
+        self.volume = np.zeros((n, buf), dtype=np.int64)
+        self.dates  = np.empty(buf, dtype="U8")
+        self._len   = 0     # 기록된 봉 수 (다음 쓰기 위치)
 
-    def _init_histories(self):
-        """초기 30일치 히스토리 생성"""
-        for code, info in MOCK_STOCKS.items():
-            price = info["price"]
-            vol   = info["volatility"]
-            for i in range(30):
-                r = np.random.normal(0, vol)
-                price *= (1 + r)
-                self.histories[code].append({
-                    "date":   (datetime.now() - timedelta(days=30-i)).strftime("%Y%m%d"),
-                    "open":   round(price * 0.995),
-                    "high":   round(price * 1.01),
-                    "low":    round(price * 0.99),
-                    "close":  round(price),
-                    "volume": random.randint(500000, 3000000)
-                })
-            self.prices[code] = round(price)
+        self._init_histories()
+        self._price_arr = self.close[:, self._len - 1].copy()   # 현재가 (종목 순서 고정)
+        self._ref_price = self._price_arr.astype(np.float64)    # 마지막으로 '변동'으로 인정된 가격
+        self.changed    = np.ones(len(self.codes), dtype=bool)  # 직전 tick에서 의미 있게 변한 종목
+
+    def _init_histories(self, days: int = 30):
+        """초기 30일치 히스토리 생성 (종목별 랜덤워크 일괄 계산)"""
+        now  = datetime.now()
+        p0   = np.array([MOCK_STOCKS[c]["price"] for c in self.codes], dtype=float)[:, None]
+        vols = np.array([MOCK_STOCKS[c]["volatility"] for c in self.codes])[:, None]
+        path = p0 * np.cumprod(1 + self._rng.normal(0, vols, size=(len(self.codes), days)), axis=1)
+
+        self.open[:, :days]   = np.rint(path * 0.995)
+        self.high[:, :days]   = np.rint(path * 1.01)
+        self.low[:, :days]    = np.rint(path * 0.99)
+        self.close[:, :days]  = np.rint(path)
+        self.volume[:, :days] = self._rng.integers(500000, 3000000, size=(len(self.codes), days),
+                                                   endpoint=True)
+        self.dates[:days] = [(now - timedelta(days=days - i)).strftime("%Y%m%d") for i in range(days)]
+        self._len = days
+
+    def _append_bar(self, date: str):
+        """새 일봉 슬롯 확보 (버퍼가 가득 차면 앞쪽 절반을 버리고 당김)"""
+        if self._len == self.BUFFER_SIZE:
+            keep = self.BUFFER_SIZE // 2
+            for arr in (self.open, self.high, self.low, self.close, self.volume):
+                arr[:, :keep] = arr[:, -keep:]
+            self.dates[:keep] = self.dates[-keep:]
+            self._len = keep
+        self.volume[:, self._len] = self._rng.integers(500000, 3000001, size=len(self.codes))
+        self.dates[self._len] = date
+        self._len += 1
 
     def tick(self) -> dict:
-        """1틱 시세 업데이트"""
-        updates = {}
-        for code, info in MOCK_STOCKS.items():
-            vol = info["volatility"] / 10
-            r   = np.random.normal(0, vol)
-            new_price = round(self.prices[code] * (1 + r))
-            self.prices[code] = new_price
-            updates[code] = new_price
-
-            # 히스토리 최신화
-            today = datetime.now().strftime("%Y%m%d")
-            if self.histories[code] and self.histories[code][-1]["date"] == today:
-                self.histories[code][-1]["close"] = new_price
-                self.histories[code][-1]["high"] = max(
-                    self.histories[code][-1]["high"], new_price)
-                self.histories[code][-1]["low"] = min(
-                    self.histories[code][-1]["low"], new_price)
-            else:
-                self.histories[code].append({
-                    "date": today,
-                    "open": new_price, "high": new_price,
-                    "low": new_price, "close": new_price,
-                    "volume": random.randint(500000, 3000000)
-                })
-        return updates
+        """1틱 시세 업데이트 (종목코드 → 가격 dict 반환)"""
+        self.advance()
+        return self.prices
+
+    @property
+    def prices(self) -> dict:
+        """종목코드 → 현재가"""
+        return dict(zip(self.codes, self._price_arr.tolist()))
+
+    def advance(self) -> np.ndarray:
+        """1틱 시세 업데이트 (codes 순서 현재가 배열 반환, dict 생성 없음)"""
+        noise = self._rng.standard_normal(len(self.codes)) * self._tick_vol
+
+        # 히스토리 최신화 (오늘 봉 갱신 또는 새 봉 추가)
+        today   = datetime.now().strftime("%Y%m%d")
+        new_bar = self.dates[self._len - 1] != today
+        if new_bar:
+            self._append_bar(today)
+        _tick_kernel(self._price_arr, noise, self.open, self.high, self.low, self.close,
+                     self._len - 1, new_bar)
+
+        # 기준가 대비 변동 종목 표시 (새 봉이면 전체)
+        moved = np.abs(self._price_arr - self._ref_price) > self._ref_price * self.PRICE_EPS
+        if new_bar:
+            moved[:] = True
+        self._ref_price[moved] = self._price_arr[moved]
+        self.changed = moved
+        return self._price_arr
+
+    def get_close_volume(self) -> tuple:
+        """전 종목 종가·거래량 (종목수, 봉수) 뷰 반환 (행 순서 = codes)"""
+        n = self._len
+        return self.close[:, :n], self.volume[:, :n]
+
+    def get_ohlcv_arrays(self, code: str) -> dict:
+        """종목 OHLCV 컬럼 뷰 반환 (복사 없음)"""
+        row, n = self._row[code], self._len
+        return {
+            "date":   self.dates[:n],
+            "open":   self.open[row, :n],
+            "high":   self.high[row, :n],
+            "low":    self.low[row, :n],
+            "close":  self.close[row, :n],
+            "volume": self.volume[row, :n],
+        }
 
     def get_ohlcv(self, code: str) -> list:
-        return self.histories.get(code, [])
+        """종목 OHLCV 행 단위(list-of-dicts) 반환"""
+        if code not in self._row:
+            return []
+        cols = self.get_ohlcv_arrays(code)
+        return [dict(zip(cols, bar)) for bar in zip(*(v.tolist() for v in cols.values()))]
 
 
 def run_simulation(duration_seconds: int = 60, send_to_server: bool = False):
@@ -118,45 +212,52 @@ def run_simulation(duration_seconds: int = 60, send_to_server: bool = False):
         take_profit_ratio=0.03
     ))
 
-    start_time = time.time()
-    cycle      = 0
+    codes = generator.codes
+    names = {code: info["name"] for code, info in MOCK_STOCKS.items()}
+    risk_mgr.bind_price_source(codes)
 
-    while time.time() - start_time < duration_seconds:
-        cycle += 1
-        print(f"\n--- Cycle {cycle} | {datetime.now().strftime('%H:%M:%S')} ---")
+    # 서버 전송은 백그라운드 스레드 1개에서 순차 처리 (루프 블로킹 방지)
+    sync_pool  = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync") if send_to_server else None
 
-        # 시세 업데이트
-        prices = generator.tick()
-        risk_mgr.update_prices(prices)
+    start_time = time.monotonic()
+    end_time   = start_time + duration_seconds
+    cycle      = 0
 
-        # 손절·익절 체크
-        to_close = risk_mgr.check_stop_conditions()
-        for item in to_close:
-            result = risk_mgr.close_position(item["code"], item["price"], item["reason"])
+    while time.monotonic() < end_time:
+        cycle += 1
+        now    = datetime.now()
+        risk_mgr.begin_cycle(now.isoformat())
+        print(f"\n--- Cycle {cycle} | {now.strftime('%H:%M:%S')} ---")
+
+        # 시세 업데이트 + 손절·익절 체크 (배열 그대로 전달)
+        to_close = risk_mgr.advance(generator.advance())
+        for code, price, reason in to_close:
+            result = risk_mgr.close_position(code, price, reason)
             if result:
                 print(f"  🔴 청산: {result['name']} PnL={result['pnl']:+,.0f}원 ({result['reason']})")
 
-        # 신호 스캔
-        stock_data = {}
-        for code in list(MOCK_STOCKS.keys()):
-            stock_data[code] = {
-                "name":  MOCK_STOCKS[code]["name"],
-                "ohlcv": generator.get_ohlcv(code),
-                "price": prices.get(code, 0)
-            }
-
-        signals = strategy.generate_signals(stock_data)
+        # 신호 스캔 (가격 변동이 있는 종목만)
+        changed = generator.changed
+        if changed.all():
+            close, volume = generator.get_close_volume()
+            signals = strategy.generate_signals_batch(codes, names, close, volume)
+        elif changed.any():
+            rows = np.flatnonzero(changed)
+            close, volume = generator.get_close_volume()
+            signals = strategy.generate_signals_batch([codes[i] for i in rows], names,
+                                                      close[rows], volume[rows])
+        else:
+            signals = []
         for sig in signals:
-            if sig.signal in (Signal.BUY, Signal.STRONG_BUY):
+            if sig.signal in _BUY_SIGNALS:
                 can_buy, reason = risk_mgr.can_buy(sig.code, sig.price)
                 if can_buy:
                     qty = risk_mgr.calculate_order_quantity(sig.code, sig.price)
                     if qty > 0:
                         risk_mgr.open_position(sig.code, sig.name, qty, sig.price)
                         print(f"  🟢 매수: {sig.name} {qty}주 @{sig.price:,}원 | {sig.reason}")
-            elif sig.signal in (Signal.SELL, Signal.STRONG_SELL):
+            elif sig.signal in _SELL_SIGNALS:
                 if sig.code in risk_mgr.positions:
-                    pos = risk_mgr.positions[sig.code]
                     result = risk_mgr.close_position(sig.code, sig.price, sig.reason)
                     if result:
                         print(f"  🔵 매도(신호): {result['name']} PnL={result['pnl']:+,.0f}원")
@@ -170,9 +271,14 @@ def run_simulation(duration_seconds: int = 60, send_to_server: bool = False):
 
         # 서버 전송
         if send_to_server:
-            _send_to_server(risk_mgr)
+            _send_to_server(risk_mgr, sync_pool)
+
+        # 다음 사이클 시각까지 대기 (처리 시간만큼 빼서 주기 누적 지연 방지)
+        next_cycle = start_time + cycle * CYCLE_INTERVAL
+        time.sleep(max(0.0, min(next_cycle, end_time) - time.monotonic()))
 
-        time.sleep(5)  # 5초 간격
+    if sync_pool:
+        sync_pool.shutdown(wait=False)
 
     # 최종 결과
     summary = risk_mgr.get_summary()
@@ -195,20 +301,34 @@ def run_simulation(duration_seconds: int = 60, send_to_server: bool = False):
     return summary
 
 
-def _send_to_server(risk_mgr: RiskManager):
-    """서버로 데이터 전송"""
+def _send_to_server(risk_mgr: RiskManager, pool: ThreadPoolExecutor):
+    """서버로 데이터 전송 (페이로드는 현재 스레드에서 만들고 POST는 백그라운드)"""
+    payload = {
+        "timestamp":  datetime.now().isoformat(),
+        "summary":    risk_mgr.get_summary(),
+        "stats":      risk_mgr.get_performance_stats(),
+        "trade_log":  risk_mgr.get_trade_log(10),
+        "mode":       "simulation"
+    }
+    pool.submit(_post_payload, payload)
+
+
+def _post_payload(payload: dict):
+    """gzip 압축 JSON POST"""
     try:
-        payload = {
-            "timestamp":  datetime.now().isoformat(),
-            "summary":    risk_mgr.get_summary(),
-            "stats":      risk_mgr.get_performance_stats(),
-            "trade_log":  risk_mgr.get_trade_log(10),
-            "mode":       "simulation"
-        }
-        resp = requests.post(
+        if ORJSON_AVAILABLE:
+            raw = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        body = gzip.compress(raw)
+        resp = _session.post(
             f"{config.SERVER_API_URL}/api/trading/sync",
-            json=payload,
-            headers={"X-API-Key": config.SERVER_API_KEY},
+            data=body,
+            headers={
+                "X-API-Key":        config.SERVER_API_KEY,
+                "Content-Type":     "application/json",
+                "Content-Encoding": "gzip",
+            },
             timeout=5
         )
         logger.debug(f"서버 전송: {resp.status_code}")
@@ -7,10 +7,21 @@
 import logging
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import functools
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
+
+from _njit import njit, NUMBA_AVAILABLE
+
+# TA-Lib 설치 시 SMA에 사용 (정의가 같은 지표만, 없으면 내장 구현)
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
 
 # KST 헬퍼
 _KST = timezone(timedelta(hours=9))
@@ -19,17 +30,31 @@ def _now_kst_str() -> str:
 
 logger = logging.getLogger(__name__)
 
+# OHLCV 입력: 행 단위 list-of-dicts(AoS) 또는 컬럼 단위 dict-of-arrays(SoA)
+OHLCVData = Union[List[Dict], Dict[str, np.ndarray]]
+
+
+def _ohlcv_len(ohlcv_data: OHLCVData) -> int:
+    """OHLCV 봉 개수 (AoS/SoA 공통)"""
+    if isinstance(ohlcv_data, dict):
+        return len(ohlcv_data.get("close", ()))
+    return len(ohlcv_data)
+
 
-class Signal(Enum):
-    BUY    = "BUY"
-    SELL   = "SELL"
-    HOLD   = "HOLD"
-    STRONG_BUY  = "STRONG_BUY"
-    STRONG_SELL = "STRONG_SELL"
+class Signal(IntEnum):
+    """매매 신호 (정수 비교, 표기는 .name)"""
+    HOLD        = 0
+    BUY         = 1
+    SELL        = 2
+    STRONG_BUY  = 3
+    STRONG_SELL = 4
 
 
-@dataclass
+@dataclass(frozen=True)
 class TradeSignal:
+    """분석 결과 (불변, __slots__ → 인스턴스 __dict__ 없음 / 신호 캐시에서 그대로 재사용)"""
+    __slots__ = ("code", "name", "signal", "price", "reason", "confidence", "timestamp")
+
     code:        str
     name:        str
     signal:      Signal
@@ -39,22 +64,181 @@ class TradeSignal:
     timestamp:   str
 
 
+# ──────────────────────────────────────────────
+# 지표 커널 (numba JIT, pandas 구현과 동일한 결과)
+# ──────────────────────────────────────────────
+@njit(cache=True, fastmath=True)
+def _sma_loop(values: np.ndarray, period: int) -> np.ndarray:
+    n   = values.shape[0]
+    out = np.full(n, np.nan)
+    acc = 0.0
+    for i in range(n):
+        acc += values[i]
+        if i >= period:
+            acc -= values[i - period]
+        if i >= period - 1:
+            out[i] = acc / period
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def _ema_loop(values: np.ndarray, period: int) -> np.ndarray:
+    n     = values.shape[0]
+    out   = np.empty(n)
+    alpha = 2.0 / (period + 1.0)
+    if n == 0:
+        return out
+    out[0] = values[0]
+    for i in range(1, n):
+        out[i] = alpha * values[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+@njit(cache=True)
+def _ema_rows(values: np.ndarray, period: int) -> np.ndarray:
+    out = np.empty(values.shape)
+    for r in range(values.shape[0]):
+        out[r] = _ema_loop(values[r], period)
+    return out
+
+
+@njit(cache=True)
+def _rsi_loop(values: np.ndarray, period: int) -> np.ndarray:
+    n     = values.shape[0]
+    gains  = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, n):
+        d = values[i] - values[i - 1]
+        if d > 0:
+            gains[i] = d
+        elif d < 0:
+            losses[i] = -d
+    avg_gain = _sma_loop(gains, period)
+    avg_loss = _sma_loop(losses, period)
+    out = np.full(n, np.nan)
+    for i in range(period - 1, n):
+        g = avg_gain[i]
+        l = avg_loss[i]
+        if l > 0:
+            out[i] = 100.0 - 100.0 / (1.0 + g / l)
+        elif g > 0:
+            out[i] = 100.0
+    return out
+
+
+def _warm_kernels():
+    """import 시 지표 커널 미리 컴파일 (쓰기 가능/읽기 전용 배열 모두, cache=True면 로드만)"""
+    dummy    = np.zeros(2)
+    readonly = dummy.copy()
+    readonly.flags.writeable = False
+    for arr in (dummy, readonly):
+        _sma_loop(arr, 1)
+        _ema_loop(arr, 1)
+        _rsi_loop(arr, 1)
+    _ema_rows(np.zeros((1, 2)), 1)
+
+
+if NUMBA_AVAILABLE:
+    _warm_kernels()
+
+
+def _window_reduce(values: np.ndarray, period: int, reducer) -> np.ndarray:
+    """고정 윈도 롤링 집계 (sliding_window_view, 앞 period-1개는 NaN)"""
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= period:
+        out[period - 1:] = reducer(sliding_window_view(values, period), axis=1)
+    return out
+
+
+def _tail_key(ohlcv_data: OHLCVData, n_bars: int) -> tuple:
+    """분석 캐시 키: (봉 개수, 마지막 봉 날짜·종가·거래량)"""
+    if isinstance(ohlcv_data, dict):
+        last = tuple(ohlcv_data[k][-1] if k in ohlcv_data else None
+                     for k in ("date", "close", "volume"))
+    else:
+        row  = ohlcv_data[-1]
+        last = (row.get("date"), row.get("close"), row.get("volume"))
+    return (n_bars,) + tuple(v.item() if isinstance(v, np.generic) else v for v in last)
+
+
+def _to_float(v) -> float:
+    """숫자/숫자 문자열 → float (변환 불가 시 NaN, pd.to_numeric(errors='coerce')와 동일)"""
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _price_value(v: float):
+    """정수 가격은 int로 (신호 가격 표기 유지)"""
+    return int(v) if float(v).is_integer() else float(v)
+
+
+def _by_confidence(signals: List["TradeSignal"]) -> List["TradeSignal"]:
+    """신뢰도 내림차순 정렬 (동률은 입력 순서 유지, list.sort(reverse=True)와 동일)"""
+    if len(signals) < 2:
+        return signals
+    conf  = np.fromiter((s.confidence for s in signals), dtype=np.float64, count=len(signals))
+    order = np.argsort(-conf, kind="stable")
+    return [signals[i] for i in order.tolist()]
+
+
+def _tail_rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """종목별 마지막 RSI 값 (최근 period개 변화량의 단순평균, rsi()와 동일 정의)"""
+    delta = np.diff(close[:, -period - 1:], axis=1)
+    if delta.shape[1] < period:
+        return np.full(close.shape[0], np.nan)
+    gain = np.where(delta > 0, delta, 0.0).sum(axis=1) / period
+    loss = np.where(delta < 0, -delta, 0.0).sum(axis=1) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    return np.where(loss > 0, rsi, np.where(gain > 0, 100.0, np.nan))
+
+
+def _ema_2d(values: np.ndarray, period: int) -> np.ndarray:
+    """행별 EMA (adjust=False)"""
+    if NUMBA_AVAILABLE:
+        return _ema_rows(values, period)
+    return pd.DataFrame(values.T).ewm(span=period, adjust=False).mean().to_numpy().T
+
+
+def _macd_tail(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """
+    종목별 MACD 최근값: (macd, signal, histogram[:, -2:])
+    EMA는 시작점 의존이라 전체 구간 재귀
+    """
+    macd_line   = _ema_2d(close, fast) - _ema_2d(close, slow)
+    signal_line = _ema_2d(macd_line, signal)
+    hist = macd_line[:, -2:] - signal_line[:, -2:]
+    return macd_line[:, -1], signal_line[:, -1], hist
+
+
 class TechnicalIndicators:
     """기술적 지표 계산 클래스"""
 
     @staticmethod
     def sma(prices: pd.Series, period: int) -> pd.Series:
         """단순 이동평균 (SMA)"""
-        return prices.rolling(window=period).mean()
+        if TALIB_AVAILABLE:
+            return pd.Series(talib.SMA(np.ascontiguousarray(prices.to_numpy(np.float64)), period),
+                             index=prices.index)
+        if NUMBA_AVAILABLE:
+            return pd.Series(_sma_loop(prices.to_numpy(np.float64), period), index=prices.index)
+        return pd.Series(_window_reduce(prices.to_numpy(np.float64), period, np.mean),
+                         index=prices.index)
 
     @staticmethod
     def ema(prices: pd.Series, period: int) -> pd.Series:
         """지수 이동평균 (EMA)"""
+        if NUMBA_AVAILABLE:
+            return pd.Series(_ema_loop(prices.to_numpy(np.float64), period), index=prices.index)
         return prices.ewm(span=period, adjust=False).mean()
 
     @staticmethod
     def rsi(prices: pd.Series, period: int = 14) -> pd.Series:
         """RSI (Relative Strength Index)"""
+        if NUMBA_AVAILABLE:
+            return pd.Series(_rsi_loop(prices.to_numpy(np.float64), period), index=prices.index)
         delta  = prices.diff()
         gain   = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss   = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
@@ -65,27 +249,39 @@ class TechnicalIndicators:
     def macd(prices: pd.Series,
              fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """MACD (Moving Average Convergence Divergence)"""
-        ema_fast   = prices.ewm(span=fast,   adjust=False).mean()
-        ema_slow   = prices.ewm(span=slow,   adjust=False).mean()
+        ema_fast   = TechnicalIndicators.ema(prices, fast)
+        ema_slow   = TechnicalIndicators.ema(prices, slow)
         macd_line  = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+        signal_line = TechnicalIndicators.ema(macd_line, signal)
         histogram  = macd_line - signal_line
         return macd_line, signal_line, histogram
 
     @staticmethod
     def bollinger_bands(prices: pd.Series,
                         period: int = 20, std_dev: float = 2.0) -> Tuple[pd.Series, pd.Series, pd.Series]:
-        """볼린저 밴드"""
-        mid  = prices.rolling(window=period).mean()
-        std  = prices.rolling(window=period).std()
-        upper = mid + (std * std_dev)
-        lower = mid - (std * std_dev)
-        return upper, mid, lower
+        """볼린저 밴드 (누적합·제곱누적합 한 번으로 이동평균·표본표준편차 계산)"""
+        values = prices.to_numpy(np.float64)
+        n    = values.shape[0]
+        mean = np.full(n, np.nan)
+        std  = np.full(n, np.nan)
+        if n >= period:
+            x   = values - values[0]            # 기준값 이동 (제곱합 상쇄 오차 완화)
+            cs  = np.concatenate(([0.0], np.cumsum(x)))
+            cs2 = np.concatenate(([0.0], np.cumsum(x * x)))
+            s   = cs[period:] - cs[:-period]
+            s2  = cs2[period:] - cs2[:-period]
+            m   = s / period
+            var = (s2 - s * m) / (period - 1)
+            mean[period - 1:] = m + values[0]
+            std[period - 1:]  = np.sqrt(np.maximum(var, 0.0))
+        mid   = pd.Series(mean, index=prices.index)
+        band  = pd.Series(std * std_dev, index=prices.index)
+        return mid + band, mid, mid - band
 
     @staticmethod
     def volume_ratio(volumes: pd.Series, period: int = 20) -> pd.Series:
         """거래량 비율 (현재 / 평균)"""
-        avg_vol = volumes.rolling(window=period).mean()
+        avg_vol = TechnicalIndicators.sma(volumes, period)
         return volumes / avg_vol
 
 
@@ -98,6 +294,14 @@ class MACrossoverStrategy:
     - 거래량 확인: 신호 신뢰도 향상
     """
 
+    # ── 조건 가중치 (열 순서: 골든·데드·MA상승·MA하락·RSI과매도·RSI과매수·MACD상승·MACD하락·BB하단·BB상단·거래량) ──
+    BUY_WEIGHTS  = np.array([3, 0, 1, 0, 2, 0, 1, 0, 1, 0, 0], dtype=np.int8)
+    SELL_WEIGHTS = np.array([0, 3, 0, 1, 0, 2, 0, 1, 0, 1, 0], dtype=np.int8)
+    REASONS      = ("골든크로스(MA{sp}>{lp})", "데드크로스(MA{sp}<{lp})", None, None,
+                    "RSI 과매도({rsi:.1f})", "RSI 과매수({rsi:.1f})", "MACD 상승", "MACD 하락",
+                    "볼린저 하단 터치", "볼린저 상단 터치", "거래량 급증({vol:.1f}x)")
+    REASON_MASK  = np.array([r is not None for r in REASONS])
+
     def __init__(self,
                  short_period: int = 5,
                  long_period:  int = 20,
@@ -113,119 +317,131 @@ class MACrossoverStrategy:
         self.rsi_overbought     = rsi_overbought
         self.volume_threshold   = volume_threshold
         self.ti = TechnicalIndicators()
-
-    def analyze(self, code: str, name: str, ohlcv_data: List[Dict]) -> Optional[TradeSignal]:
+        # 생성 후 바뀌지 않는 파라미터 → 판정용 상수 튜플·사유 문자열을 미리 고정
+        self._params  = (short_period, long_period, rsi_period,
+                         rsi_oversold, rsi_overbought, volume_threshold)
+        self._reasons = tuple(r and r.replace("{sp}", str(short_period)).replace("{lp}", str(long_period))
+                              for r in self.REASONS)
+        self._sig_cache: Dict[str, Tuple[tuple, TradeSignal]] = {}   # 종목코드 → (꼬리 키, 신호)
+
+    def analyze(self, code: str, name: str, ohlcv_data: OHLCVData) -> Optional[TradeSignal]:
         """
         종목 분석 → 매매 신호 반환
         ohlcv_data: [{"date": "20240101", "open": ..., "high": ..., "low": ..., "close": ..., "volume": ...}, ...]
+                    또는 {"date": arr, "open": arr, ..., "volume": arr}
         """
-        if len(ohlcv_data) < self.long_period + 5:
-            logger.warning(f"[{code}] {name}: OHLCV 데이터 부족 ({len(ohlcv_data)}개, 필요 {self.long_period + 5}개) → 스킵")
+        n_bars = _ohlcv_len(ohlcv_data)
+        if n_bars < self.long_period + 5:
+            logger.warning(f"[{code}] {name}: OHLCV 데이터 부족 ({n_bars}개, 필요 {self.long_period + 5}개) → 스킵")
             return None
 
-        df = pd.DataFrame(ohlcv_data)
-        df['close']  = pd.to_numeric(df['close'],  errors='coerce')
-        df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
-        df = df.dropna()
-
-        close   = df['close']
-        volume  = df['volume']
-
-        # 지표 계산
-        short_ma  = self.ti.sma(close, self.short_period)
-        long_ma   = self.ti.sma(close, self.long_period)
-        rsi_vals  = self.ti.rsi(close, self.rsi_period)
-        vol_ratio = self.ti.volume_ratio(volume)
-        macd_line, signal_line, histogram = self.ti.macd(close)
-        bb_upper, bb_mid, bb_lower = self.ti.bollinger_bands(close)
-
-        # 최근 값
-        curr_price   = close.iloc[-1]
-        curr_short   = short_ma.iloc[-1]
-        curr_long    = long_ma.iloc[-1]
-        prev_short   = short_ma.iloc[-2]
-        prev_long    = long_ma.iloc[-2]
-        curr_rsi     = rsi_vals.iloc[-1]
-        curr_vol_r   = vol_ratio.iloc[-1]
-        curr_macd    = macd_line.iloc[-1]
-        curr_signal  = signal_line.iloc[-1]
-        curr_bb_lower = bb_lower.iloc[-1]
-        curr_bb_upper = bb_upper.iloc[-1]
-
-        now_str = _now_kst_str()
-        reasons = []
-        buy_score = 0
-        sell_score = 0
-
-        # ── 골든크로스 / 데드크로스 판단 ──
-        golden_cross = (prev_short <= prev_long) and (curr_short > curr_long)
-        dead_cross   = (prev_short >= prev_long) and (curr_short < curr_long)
-
-        if golden_cross:
-            buy_score += 3
-            reasons.append(f"골든크로스(MA{self.short_period}>{self.long_period})")
-        if dead_cross:
-            sell_score += 3
-            reasons.append(f"데드크로스(MA{self.short_period}<{self.long_period})")
-
-        # MA 정렬
-        if curr_short > curr_long:
-            buy_score += 1
+        # 같은 데이터 재분석 방지 (마지막 봉 날짜·종가·거래량 + 봉 개수로 식별)
+        key    = _tail_key(ohlcv_data, n_bars)
+        cached = self._sig_cache.get(code)
+        if cached is not None and cached[0] == key:
+            logger.debug(f"[{code}] {name}: 신호 캐시 사용")
+            return cached[1]
+
+        if isinstance(ohlcv_data, dict):
+            close  = np.asarray(ohlcv_data["close"],  dtype=np.float64)
+            volume = np.asarray(ohlcv_data["volume"], dtype=np.float64)
         else:
-            sell_score += 1
-
-        # ── RSI 필터 ──
-        if curr_rsi < self.rsi_oversold:
-            buy_score += 2
-            reasons.append(f"RSI 과매도({curr_rsi:.1f})")
-        elif curr_rsi > self.rsi_overbought:
-            sell_score += 2
-            reasons.append(f"RSI 과매수({curr_rsi:.1f})")
-
-        # ── MACD 신호 ──
-        if curr_macd > curr_signal and histogram.iloc[-1] > histogram.iloc[-2]:
-            buy_score += 1
-            reasons.append("MACD 상승")
-        elif curr_macd < curr_signal and histogram.iloc[-1] < histogram.iloc[-2]:
-            sell_score += 1
-            reasons.append("MACD 하락")
-
-        # ── 볼린저밴드 ──
-        if curr_price <= curr_bb_lower * 1.01:
-            buy_score += 1
-            reasons.append("볼린저 하단 터치")
-        elif curr_price >= curr_bb_upper * 0.99:
-            sell_score += 1
-            reasons.append("볼린저 상단 터치")
-
-        # ── 거래량 확인 ──
-        high_volume = curr_vol_r >= self.volume_threshold
-        if high_volume:
-            reasons.append(f"거래량 급증({curr_vol_r:.1f}x)")
-
-        # ── 신호 결정 ──
+            close  = np.fromiter((_to_float(r.get("close"))  for r in ohlcv_data), np.float64, n_bars)
+            volume = np.fromiter((_to_float(r.get("volume")) for r in ohlcv_data), np.float64, n_bars)
+        valid = ~(np.isnan(close) | np.isnan(volume))
+        if not valid.all():
+            close, volume = close[valid], volume[valid]
+        signal = self._analyze_columns(code, name, close, volume)
+        self._sig_cache[code] = (key, signal)
+        return signal
+
+    def clear_cache(self):
+        """신호 캐시 비우기 (OHLCV 재로드 시 호출)"""
+        self._sig_cache.clear()
+
+    def _analyze_columns(self, code: str, name: str,
+                         close: np.ndarray, volume: np.ndarray) -> TradeSignal:
+        """단일 종목 신호 계산 (1행 배치로 위임)"""
+        return self.analyze_batch((code,), {code: name}, close[None, :], volume[None, :])[0]
+
+    def analyze_batch(self, codes: Sequence[str], names: Dict[str, str],
+                      close: np.ndarray, volume: np.ndarray) -> List[TradeSignal]:
+        """
+        여러 종목 지표·점수를 (종목수, 봉수) 행렬 단위로 한 번에 계산
+        close / volume: float64 (종목수, 봉수), 행 순서 = codes (길이 검사·결측 제거는 호출 측 책임)
+        판단에 쓰는 최근 1~2개 값만 꼬리 구간에서 계산 (MACD만 전체 EMA 재귀)
+        Returns: codes 순서의 TradeSignal 목록 (HOLD 포함)
+        """
+        sp, lp, rsi_period, oversold, overbought, vol_threshold = self._params
+        reason_fmt = self._reasons
+
+        # ── 지표 (최근 값, 종목 축 벡터) ──
+        price      = close[:, -1]
+        curr_short = close[:, -sp:].mean(axis=1)
+        prev_short = close[:, -sp - 1:-1].mean(axis=1)
+        curr_long  = close[:, -lp:].mean(axis=1)
+        prev_long  = close[:, -lp - 1:-1].mean(axis=1)
+        rsi        = _tail_rsi(close, rsi_period)
+        vol_r      = volume[:, -1] / volume[:, -20:].mean(axis=1)
+        macd, macd_signal, hist = _macd_tail(close)
+        bb_mid     = close[:, -20:].mean(axis=1)
+        bb_band    = close[:, -20:].std(axis=1, ddof=1) * 2.0
+        bb_lower   = bb_mid - bb_band
+        bb_upper   = bb_mid + bb_band
+
+        # ── 조건 (종목 축 bool 벡터) ──
+        golden   = (prev_short <= prev_long) & (curr_short > curr_long)   # 골든크로스
+        dead     = (prev_short >= prev_long) & (curr_short < curr_long)   # 데드크로스
+        ma_up    = curr_short > curr_long                                 # MA 정렬
+        rsi_low  = rsi < oversold
+        rsi_high = ~rsi_low & (rsi > overbought)
+        macd_up  = (macd > macd_signal) & (hist[:, 1] > hist[:, 0])
+        macd_dn  = ~macd_up & (macd < macd_signal) & (hist[:, 1] < hist[:, 0])
+        bb_low   = price <= bb_lower * 1.01
+        bb_high  = ~bb_low & (price >= bb_upper * 0.99)
+        high_vol = vol_r >= vol_threshold
+
+        # 조건 행렬 (종목수, 조건수) × 가중치 → 분기 없는 점수 합산
+        preds = np.stack([golden, dead, ma_up, ~ma_up, rsi_low, rsi_high,
+                          macd_up, macd_dn, bb_low, bb_high, high_vol], axis=1).view(np.int8)
+        buy_scores  = preds @ self.BUY_WEIGHTS
+        sell_scores = preds @ self.SELL_WEIGHTS
+        reason_hit  = preds.astype(bool) & self.REASON_MASK
+
+        # ── 종목별 신호 결정 ──
+        now_str   = _now_kst_str()
         max_score = 7
-        confidence = max(buy_score, sell_score) / max_score
-
-        if buy_score >= 4 and (golden_cross or high_volume):
-            signal = Signal.STRONG_BUY if buy_score >= 5 else Signal.BUY
-        elif sell_score >= 4 and (dead_cross or high_volume):
-            signal = Signal.STRONG_SELL if sell_score >= 5 else Signal.SELL
-        elif buy_score > sell_score and buy_score >= 3:
-            signal = Signal.BUY
-        elif sell_score > buy_score and sell_score >= 3:
-            signal = Signal.SELL
-        else:
-            signal = Signal.HOLD
-
-        reason_str = " | ".join(reasons) if reasons else "신호 없음"
-        logger.info(f"[{code}] {name} | 신호: {signal.value} | 점수: 매수{buy_score}/매도{sell_score} | {reason_str}")
-
-        return TradeSignal(
-            code=code, name=name, signal=signal,
-            price=curr_price, reason=reason_str,
-            confidence=round(confidence, 2), timestamp=now_str
-        )
+        results   = []
+        for i, code in enumerate(codes):
+            name       = names.get(code, code)
+            buy_score  = int(buy_scores[i])
+            sell_score = int(sell_scores[i])
+
+            reasons = [reason_fmt[j].format(rsi=rsi[i], vol=vol_r[i])
+                       for j in np.flatnonzero(reason_hit[i])]
+
+            confidence = max(buy_score, sell_score) / max_score
+
+            if buy_score >= 4 and (golden[i] or high_vol[i]):
+                signal = Signal.STRONG_BUY if buy_score >= 5 else Signal.BUY
+            elif sell_score >= 4 and (dead[i] or high_vol[i]):
+                signal = Signal.STRONG_SELL if sell_score >= 5 else Signal.SELL
+            elif buy_score > sell_score and buy_score >= 3:
+                signal = Signal.BUY
+            elif sell_score > buy_score and sell_score >= 3:
+                signal = Signal.SELL
+            else:
+                signal = Signal.HOLD
+
+            reason_str = " | ".join(reasons) if reasons else "신호 없음"
+            logger.info(f"[{code}] {name} | 신호: {signal.name} | 점수: 매수{buy_score}/매도{sell_score} | {reason_str}")
+
+            results.append(TradeSignal(
+                code=code, name=name, signal=signal,
+                price=_price_value(price[i]), reason=reason_str,
+                confidence=round(confidence, 2), timestamp=now_str
+            ))
+        return results
 
     def generate_signals(self, stock_data: Dict[str, Dict]) -> List[TradeSignal]:
         """
@@ -239,127 +455,209 @@ class MACrossoverStrategy:
                 signals.append(signal)
 
         # 신뢰도 내림차순 정렬
-        signals.sort(key=lambda x: x.confidence, reverse=True)
-        return signals
+        return _by_confidence(signals)
 
+    def generate_signals_batch(self, codes: Sequence[str], names: Dict[str, str],
+                               close: np.ndarray, volume: np.ndarray) -> List[TradeSignal]:
+        """
+        여러 종목 동시 분석 (컬럼 배열 입력, 행 변환 없음)
+        close / volume: (종목수, 봉수) 배열, 행 순서 = codes
+        """
+        signals = []
+        if close.shape[1] < self.long_period + 5:
+            logger.warning(f"OHLCV 데이터 부족 ({close.shape[1]}개, 필요 {self.long_period + 5}개) → 스킵")
+            return signals
+        for signal in self.analyze_batch(codes, names, close.astype(np.float64),
+                                         volume.astype(np.float64)):
+            if signal.signal != Signal.HOLD:
+                signals.append(signal)
 
-class BacktestEngine:
-    """
-    백테스트 엔진 - 전략 검증용
-    """
+        # 신뢰도 내림차순 정렬
+        return _by_confidence(signals)
 
-    def __init__(self, strategy: MACrossoverStrategy,
-                 initial_capital: float = 1_000_000,
-                 commission_rate: float = 0.00015,   # 키움 0.015%
-                 slippage: float = 0.001):
 
-        self.strategy        = strategy
-        self.initial_capital = initial_capital
-        self.commission_rate = commission_rate
-        self.slippage        = slippage
+# ──────────────────────────────────────────────
+# 백테스트 커널 (파라미터별 특수화 + numba JIT)
+# ──────────────────────────────────────────────
+_SELL_REASONS = ("", "데드크로스", "손절", "익절")
 
-    def run(self, ohlcv_data: List[Dict], code: str = "TEST", name: str = "테스트종목") -> Dict:
-        """
-        단일 종목 백테스트 실행
-        Returns: 성과 지표 딕셔너리
-        """
-        if len(ohlcv_data) < self.strategy.long_period + 10:
-            return {"error": "데이터 부족"}
 
-        df = pd.DataFrame(ohlcv_data)
-        df['close']  = pd.to_numeric(df['close'],  errors='coerce')
-        df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
-
-        close   = df['close']
-        short_ma = TechnicalIndicators.sma(close, self.strategy.short_period)
-        long_ma  = TechnicalIndicators.sma(close, self.strategy.long_period)
-        rsi_vals = TechnicalIndicators.rsi(close, self.strategy.rsi_period)
-
-        capital  = self.initial_capital
-        position = 0          # 보유 주식 수
-        buy_price = 0
-        trades   = []
-        equity_curve = [capital]
-
-        for i in range(self.strategy.long_period + 1, len(df)):
-            price      = close.iloc[i]
-            prev_short = short_ma.iloc[i - 1]
-            prev_long  = long_ma.iloc[i - 1]
-            curr_short = short_ma.iloc[i]
-            curr_long  = long_ma.iloc[i]
-            curr_rsi   = rsi_vals.iloc[i]
+@functools.lru_cache(maxsize=32)
+def _make_backtest_kernel(start: int, rsi_overbought: float,
+                          slippage: float, commission_rate: float,
+                          stop_loss_ratio: float = 0.01, take_profit_ratio: float = 0.03):
+    """
+    전략 파라미터를 상수로 고정한 백테스트 루프 생성
+    같은 파라미터 조합은 컴파일된 커널 재사용
+    거래 기록: (봉 인덱스, 0=매수/1=매도, 체결가, 수량, 잔금, 손익, 매도사유 코드)
+    """
+    buy_slip   = 1 + slippage
+    sell_slip  = 1 - slippage
+    buy_comm   = 1 + commission_rate
+    sell_comm  = 1 - commission_rate
+    stop_mult  = 1 - stop_loss_ratio
+    take_mult  = 1 + take_profit_ratio
+
+    @njit
+    def kernel(close, short_ma, long_ma, rsi_vals, capital, equity):
+        n = close.shape[0]
+        trades = np.empty((n, 7))
+        n_trades  = 0
+        position  = 0
+        buy_price = 0.0
+        equity[0] = capital
+
+        for i in range(start, n):
+            price      = close[i]
+            prev_short = short_ma[i - 1]
+            prev_long  = long_ma[i - 1]
+            curr_short = short_ma[i]
+            curr_long  = long_ma[i]
 
             # 골든크로스 + RSI 미과매수 → 매수
             if (prev_short <= prev_long and curr_short > curr_long
-                    and curr_rsi < self.strategy.rsi_overbought
+                    and rsi_vals[i] < rsi_overbought
                     and position == 0 and capital > 0):
 
-                exec_price = price * (1 + self.slippage)
+                exec_price = price * buy_slip
                 qty = int(capital * 0.95 / exec_price)
                 if qty > 0:
-                    cost = qty * exec_price * (1 + self.commission_rate)
-                    capital -= cost
-                    position = qty
+                    capital  -= qty * exec_price * buy_comm
+                    position  = qty
                     buy_price = exec_price
-                    trades.append({
-                        "type": "BUY", "date": df.iloc[i]["date"],
-                        "price": exec_price, "qty": qty, "capital": capital
-                    })
+                    trades[n_trades, 0] = i
+                    trades[n_trades, 1] = 0
+                    trades[n_trades, 2] = exec_price
+                    trades[n_trades, 3] = qty
+                    trades[n_trades, 4] = capital
+                    trades[n_trades, 5] = 0.0
+                    trades[n_trades, 6] = 0
+                    n_trades += 1
 
             # 데드크로스 또는 손절/익절 → 매도
             elif position > 0:
-                dead_cross = (prev_short >= prev_long and curr_short < curr_long)
-                stop_loss  = price <= buy_price * (1 - 0.01)
-                take_profit = price >= buy_price * (1 + 0.03)
+                dead_cross  = prev_short >= prev_long and curr_short < curr_long
+                stop_loss   = price <= buy_price * stop_mult
+                take_profit = price >= buy_price * take_mult
 
                 if dead_cross or stop_loss or take_profit:
-                    exec_price = price * (1 - self.slippage)
-                    revenue    = position * exec_price * (1 - self.commission_rate)
+                    exec_price = price * sell_slip
+                    revenue    = position * exec_price * sell_comm
                     capital   += revenue
-                    pnl        = revenue - (position * buy_price * (1 + self.commission_rate))
-                    reason     = "데드크로스" if dead_cross else ("손절" if stop_loss else "익절")
-
-                    trades.append({
-                        "type": "SELL", "date": df.iloc[i]["date"],
-                        "price": exec_price, "qty": position,
-                        "capital": capital, "pnl": pnl, "reason": reason
-                    })
+                    trades[n_trades, 0] = i
+                    trades[n_trades, 1] = 1
+                    trades[n_trades, 2] = exec_price
+                    trades[n_trades, 3] = position
+                    trades[n_trades, 4] = capital
+                    trades[n_trades, 5] = revenue - position * buy_price * buy_comm
+                    trades[n_trades, 6] = 1 if dead_cross else (2 if stop_loss else 3)
+                    n_trades += 1
                     position  = 0
-                    buy_price = 0
+                    buy_price = 0.0
 
             # 자산 곡선
-            portfolio_value = capital + position * price
-            equity_curve.append(portfolio_value)
+            equity[i - start + 1] = capital + position * price
+
+        return capital, position, trades[:n_trades]
+
+    return kernel
+
+
+class BacktestEngine:
+    """
+    백테스트 엔진 - 전략 검증용
+    """
+
+    def __init__(self, strategy: MACrossoverStrategy,
+                 initial_capital: float = 1_000_000,
+                 commission_rate: float = 0.00015,   # 키움 0.015%
+                 slippage: float = 0.001,
+                 max_bars: int = 1024):
+
+        self.strategy        = strategy
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.slippage        = slippage
+        self._equity         = np.empty(max_bars)   # 자산 곡선 버퍼 (run 간 재사용)
+
+    def reset(self, n_bars: int = 0):
+        """다음 run 준비 - 버퍼 재사용, 부족할 때만 확장"""
+        if n_bars > self._equity.shape[0]:
+            self._equity = np.empty(max(n_bars, 2 * self._equity.shape[0]))
+
+    def run(self, ohlcv_data: OHLCVData, code: str = "TEST", name: str = "테스트종목") -> Dict:
+        """
+        단일 종목 백테스트 실행 (AoS/SoA 입력 모두 지원)
+        Returns: 성과 지표 딕셔너리
+        """
+        if _ohlcv_len(ohlcv_data) < self.strategy.long_period + 10:
+            return {"error": "데이터 부족"}
+
+        # 필요한 컬럼(date·close)만 numpy로 추출, 32비트 정수 입력도 금액 계산 시 오버플로 없도록 float64
+        if isinstance(ohlcv_data, dict):
+            close = np.asarray(ohlcv_data["close"], dtype=np.float64)
+            dates = ohlcv_data["date"]
+        else:
+            close = np.fromiter((_to_float(r.get("close")) for r in ohlcv_data),
+                                np.float64, len(ohlcv_data))
+            dates = [r.get("date") for r in ohlcv_data]
+
+        close_s  = pd.Series(close, copy=False)
+        short_ma = TechnicalIndicators.sma(close_s, self.strategy.short_period).to_numpy()
+        long_ma  = TechnicalIndicators.sma(close_s, self.strategy.long_period).to_numpy()
+        rsi_vals = TechnicalIndicators.rsi(close_s, self.strategy.rsi_period).to_numpy()
+
+        start = self.strategy.long_period + 1
+        n_bars = close.shape[0]
+        self.reset(n_bars - start + 1)
+        equity = self._equity[:n_bars - start + 1]    # 자산 곡선 (사전 할당 버퍼)
+
+        kernel = _make_backtest_kernel(start, float(self.strategy.rsi_overbought),
+                                       self.slippage, self.commission_rate)
+        capital, position, events = kernel(
+            close, short_ma, long_ma, rsi_vals, float(self.initial_capital), equity
+        )
+
+        trades = []
+        for bar, side, price, qty, cap, pnl, reason in events.tolist():
+            date = dates[int(bar)]
+            if isinstance(date, np.generic):
+                date = date.item()
+            trade = {"type": "SELL" if side else "BUY", "date": date,
+                     "price": price, "qty": int(qty), "capital": cap}
+            if side:
+                trade["pnl"]    = pnl
+                trade["reason"] = _SELL_REASONS[int(reason)]
+            trades.append(trade)
 
         # 미청산 포지션 처리
         if position > 0:
-            final_price = close.iloc[-1]
+            final_price = close[-1]
             capital += position * final_price
 
         # 성과 계산
         total_return     = (capital - self.initial_capital) / self.initial_capital * 100
-        buy_trades  = [t for t in trades if t["type"] == "BUY"]
-        sell_trades = [t for t in trades if t["type"] == "SELL"]
-        winning     = [t for t in sell_trades if t.get("pnl", 0) > 0]
-        losing      = [t for t in sell_trades if t.get("pnl", 0) <= 0]
-        win_rate    = len(winning) / len(sell_trades) * 100 if sell_trades else 0
+        is_sell     = events[:, 1] != 0             # 커널 체결 배열에서 바로 집계
+        buy_count   = int((~is_sell).sum())
+        sell_pnls   = events[is_sell, 5]
+        winning     = int((sell_pnls > 0).sum())
+        losing      = len(sell_pnls) - winning
+        win_rate    = winning / len(sell_pnls) * 100 if len(sell_pnls) else 0
 
         # MDD 계산
-        eq = np.array(equity_curve)
-        peak = np.maximum.accumulate(eq)
-        drawdown = (eq - peak) / peak * 100
-        mdd = drawdown.min()
+        peak = np.maximum.accumulate(equity)
+        mdd  = (equity / peak - 1).min() * 100
 
         return {
             "code": code, "name": name,
             "initial_capital": self.initial_capital,
             "final_capital": round(capital, 0),
             "total_return_pct": round(total_return, 2),
-            "total_trades": len(buy_trades),
+            "total_trades": buy_count,
             "win_rate_pct": round(win_rate, 1),
-            "winning_trades": len(winning),
-            "losing_trades": len(losing),
+            "winning_trades": winning,
+            "losing_trades": losing,
             "max_drawdown_pct": round(mdd, 2),
             "trades": trades,
-            "equity_curve": equity_curve
+            "equity_curve": equity.tolist()
         }
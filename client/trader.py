@@ -8,11 +8,20 @@ import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+import os
+import gzip
+import json
 import time
+import sched
+import queue
+import signal
+import threading
 import logging
-import schedule
+import numpy as np
 import requests
-from datetime import datetime, time as dtime, timezone, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timezone, timedelta, time as dtime
 
 # ── KST 타임존 헬퍼 (AWS는 UTC이므로 +9 적용) ──
 KST = timezone(timedelta(hours=9))
@@ -26,8 +35,61 @@ from kiwoom_wrapper import KiwoomWrapper
 from strategy import MACrossoverStrategy, Signal
 from risk_manager import RiskManager, RiskConfig
 
+# orjson 설치 시 서버 페이로드 직렬화에 사용 (없으면 표준 json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_GZIP_MIN_BYTES = 1024   # 이보다 큰 페이로드만 gzip 압축
+_MAX_IDLE_SEC   = 1.5    # 스케줄 대기 상한 - Windows는 Event.wait 중 Ctrl+C가 전달되지 않으므로 짧게 유지
+
+# ── 일봉 디스크 캐시 (.cache/ohlcv/{code}.npz) ──
+_OHLCV_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ohlcv")
+_OHLCV_FIELDS    = ("date", "open", "high", "low", "close", "volume")
+
+
+def _load_ohlcv_cache(code: str) -> Optional[tuple]:
+    """(조회일시 ISO 문자열, 레코드 리스트) 반환 (캐시 없거나 손상 시 None)"""
+    path = os.path.join(_OHLCV_CACHE_DIR, f"{code}.npz")
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as npz:
+            fetched = str(npz["fetched"])
+            cols    = [npz[k].tolist() for k in _OHLCV_FIELDS]
+    except Exception as e:
+        logger.warning(f"OHLCV 캐시 읽기 실패 ({code}): {e}")
+        return None
+    return fetched, [dict(zip(_OHLCV_FIELDS, row)) for row in zip(*cols)]
+
+
+def _last_session_close(now: datetime) -> datetime:
+    """가장 최근에 마감된 정규장의 마감 시각 (주말 제외 - 공휴일은 캐시 미스로 재조회)"""
+    d = now.date()
+    if now.time() < config.MARKET_CLOSE:
+        d -= timedelta(days=1)
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return datetime.combine(d, config.MARKET_CLOSE, tzinfo=KST)
+
+
+def _save_ohlcv_cache(code: str, fetched: str, ohlcv: List[Dict]):
+    """일봉 레코드를 컬럼 배열로 저장"""
+    if not ohlcv:
+        return
+    try:
+        os.makedirs(_OHLCV_CACHE_DIR, exist_ok=True)
+        cols = {"date": np.array([r["date"] for r in ohlcv], dtype="U8")}
+        for k in _OHLCV_FIELDS[1:]:
+            cols[k] = np.fromiter((r[k] for r in ohlcv), dtype=np.int64, count=len(ohlcv))
+        np.savez(os.path.join(_OHLCV_CACHE_DIR, f"{code}.npz"), fetched=np.array(fetched), **cols)
+    except Exception as e:
+        logger.warning(f"OHLCV 캐시 저장 실패 ({code}): {e}")
+
 
 def setup_logging():
     """로거 설정"""
@@ -112,6 +174,15 @@ class AutoTrader:
 
         self.is_running  = False
         self.stock_data: Dict[str, Dict] = {}   # 종목 시세 캐시
+        self._sched = sched.scheduler(time.time, time.sleep)   # 작업 예약 (epoch 초 기준)
+        self._wake  = threading.Event()                         # 종료 요청 시 대기 해제
+
+        # 네트워크 I/O 전용 워커 (서버 동기화·상태 전송·알림이 매매 루프를 막지 않도록)
+        self._io_q: "queue.Queue[tuple]" = queue.Queue()
+        self._telebot   = None
+        self._http      = self._make_session()   # 서버 연결 재사용 (I/O 워커 전용)
+        self._io_thread = threading.Thread(target=self._io_worker, name="trader-io", daemon=True)
+        self._io_thread.start()
 
     # ──────────────────────────────────────────────
     # 시작·종료
@@ -133,6 +204,7 @@ class AutoTrader:
         actual_mode = "모의투자" if self.kiwoom.is_mock else "실전투자"
         logger.info(f"   ✅ 실제 접속 모드: {actual_mode}")
         self.is_running = True
+        signal.signal(signal.SIGINT, self._on_sigint)
         self._schedule_jobs()
         self._send_status("STARTED")
         self._sync_server(force=True)   # 시작 즉시 대시보드 데이터 전송
@@ -147,12 +219,12 @@ class AutoTrader:
             self._scan_signals()
 
         try:
+            # 다음 예약 시각까지 대기 (최대 _MAX_IDLE_SEC씩 - Ctrl+C 반응성 유지)
             while self.is_running:
-                try:
-                    schedule.run_pending()
-                except Exception as job_err:
-                    logger.error(f"[스케줄 오류] {job_err}", exc_info=True)
-                time.sleep(1)
+                delay = self._sched.run(blocking=False)
+                if delay is None:
+                    break
+                self._wake.wait(min(delay, _MAX_IDLE_SEC))
         except KeyboardInterrupt:
             logger.info("사용자 중단 요청")
         except Exception as loop_err:
@@ -163,8 +235,11 @@ class AutoTrader:
     def stop(self):
         """자동매매 종료"""
         self.is_running = False
+        self._wake.set()
         self.kiwoom.disconnect()
         self._send_status("STOPPED")
+        self._io_q.put((None, ()))          # 대기 중인 전송 처리 후 워커 종료
+        self._io_thread.join(timeout=10)
         logger.info("🔴 자동매매 시스템 종료")
 
     # ──────────────────────────────────────────────
@@ -172,15 +247,59 @@ class AutoTrader:
     # ──────────────────────────────────────────────
     def _schedule_jobs(self):
         """장 시간별 작업 스케줄 등록"""
-        schedule.every().day.at("08:50").do(self._pre_market)
-        schedule.every().day.at("09:00").do(self._market_open)
-        schedule.every(5).minutes.do(self._monitor_positions)  # 5분마다 포지션 모니터링
-        schedule.every(30).minutes.do(self._scan_signals)       # 30분마다 신호 스캔
-        schedule.every().day.at("15:20").do(self._pre_close)
-        schedule.every().day.at("15:30").do(self._market_close)
-        schedule.every().hour.do(self._sync_server)             # 1시간마다 서버 동기화
+        self._every_day("08:50", self._pre_market)
+        self._every_day("09:00", self._market_open)
+        self._every(5 * 60,  self._monitor_positions)   # 5분마다 포지션 모니터링
+        self._every(30 * 60, self._scan_signals)        # 30분마다 신호 스캔
+        self._every_day("15:20", self._pre_close)
+        self._every_day("15:30", self._market_close)
+        self._every_day("15:40", self._after_market)   # 마감 일봉 캐시 → 다음 08:50 준비는 TR 생략
+        self._every(60 * 60, self._sync_server)         # 1시간마다 서버 동기화
         logger.info("✅ 스케줄 등록 완료")
 
+    def _every_day(self, hhmm: str, job):
+        """매일 hhmm(KST) 실행 - 실행 후 다음 날 같은 시각으로 재예약"""
+        at_time = dtime.fromisoformat(hhmm)
+
+        def next_run() -> float:
+            now = now_kst()
+            at  = datetime.combine(now.date(), at_time, tzinfo=KST)
+            if at <= now:
+                at += timedelta(days=1)
+            return at.timestamp()
+
+        def run():
+            self._run_job(job)
+            self._sched.enterabs(next_run(), 0, run)
+
+        self._sched.enterabs(next_run(), 0, run)
+
+    def _every(self, seconds: float, job):
+        """seconds 간격 반복 - 예정 시각 기준 재예약 (지연 누적 없음, 밀린 회차는 건너뜀)"""
+        def run(at: float):
+            self._run_job(job)
+            nxt = at + seconds
+            now = time.time()
+            while nxt <= now:
+                nxt += seconds
+            self._sched.enterabs(nxt, 1, run, (nxt,))
+
+        first = time.time() + seconds
+        self._sched.enterabs(first, 1, run, (first,))
+
+    def _run_job(self, job):
+        """예약 작업 실행 (예외가 스케줄러를 멈추지 않도록)"""
+        try:
+            job()
+        except Exception as job_err:
+            logger.error(f"[스케줄 오류] {job_err}", exc_info=True)
+
+    def _on_sigint(self, signum, frame):
+        """Ctrl+C → 루프 종료 요청 (정리는 start()의 finally에서 stop())"""
+        logger.info("사용자 중단 요청")
+        self.is_running = False
+        self._wake.set()
+
     # ──────────────────────────────────────────────
     # 장 시간별 루틴
     # ──────────────────────────────────────────────
@@ -201,19 +320,18 @@ class AutoTrader:
         if not self._is_market_hours():
             return
 
-        # 현재가 업데이트
-        price_data = {}
-        for code in list(self.risk_manager.positions.keys()):
-            info = self.kiwoom.get_current_price(code)
-            if info and info.get("price"):
-                price_data[code] = info["price"]
-
-        self.risk_manager.update_prices(price_data)
+        # 현재가 업데이트 (복수종목 TR 1회 → 보유 종목 순서 배열로 반영, 조회 실패는 NaN → 무시)
+        codes  = list(self.risk_manager.positions.keys())
+        quotes = self.kiwoom.get_current_prices(codes)
+        prices = np.fromiter(
+            (quotes[c]["price"] if c in quotes else np.nan for c in codes),
+            dtype=np.float64, count=len(codes))
+        self.risk_manager.update_prices(codes, prices)
 
         # 손절·익절 체크
         to_close = self.risk_manager.check_stop_conditions()
-        for item in to_close:
-            self._execute_sell(item["code"], item["price"], item["reason"])
+        for code, price, reason in to_close:
+            self._execute_sell(code, price, reason)
 
     def _scan_signals(self):
         """매매 신호 스캔 및 주문 실행"""
@@ -257,6 +375,10 @@ class AutoTrader:
         logger.info(f"📊 오늘의 결과 | 일일손익: {summary['daily_pnl']:+,.0f}원")
         self._sync_server(force=True)
 
+    def _after_market(self):
+        """장 후 정리 (15:40) - 당일 확정 일봉 조회·캐시"""
+        self._load_ohlcv_data()
+
     # ──────────────────────────────────────────────
     # 매수·매도 처리
     # ──────────────────────────────────────────────
@@ -310,11 +432,25 @@ class AutoTrader:
     # ──────────────────────────────────────────────
     def _load_ohlcv_data(self):
         """감시 종목 OHLCV 데이터 로드"""
-        today_str = now_kst().strftime("%Y%m%d")
+        now        = now_kst()
+        today_str  = now.strftime("%Y%m%d")
+        last_close = _last_session_close(now)
+        use_cache  = not self._is_market_hours()
         self.stock_data = {}
+        self.strategy.clear_cache()
+        hits = 0
 
         for code in config.WATCHLIST:
-            ohlcv = self.kiwoom.get_daily_ohlcv(code, today_str, count=60)
+            # 장 밖에서는 직전 정규장 마감 이후 받은 일봉(마지막 봉 = 그 세션)이면 새 봉이 없으므로 TR 생략
+            cached = _load_ohlcv_cache(code) if use_cache else None
+            if cached and cached[1] \
+                    and datetime.fromisoformat(cached[0]) >= last_close \
+                    and cached[1][-1]["date"] == last_close.strftime("%Y%m%d"):
+                ohlcv = cached[1][-60:]
+                hits += 1
+            else:
+                ohlcv = self.kiwoom.get_daily_ohlcv(code, today_str, count=60)
+                _save_ohlcv_cache(code, now.isoformat(), ohlcv)
             current = self.kiwoom.get_current_price(code)
 
             self.stock_data[code] = {
@@ -322,15 +458,14 @@ class AutoTrader:
                 "ohlcv": ohlcv,
                 "price": current.get("price", 0)
             }
-            time.sleep(0.2)   # API 호출 제한 방지
 
-        logger.info(f"데이터 로드 완료: {len(self.stock_data)}개 종목")
+        logger.info(f"데이터 로드 완료: {len(self.stock_data)}개 종목 (일봉 캐시 {hits}개)")
 
     # ──────────────────────────────────────────────
     # 서버 동기화 (Lightsail)
     # ──────────────────────────────────────────────
     def _sync_server(self, force: bool = False):
-        """Lightsail 서버로 데이터 전송"""
+        """Lightsail 서버로 데이터 전송 (스냅샷은 매매 스레드에서 만들고 전송만 I/O 워커에 위임)"""
         try:
             payload = {
                 "timestamp":  now_kst().isoformat(),
@@ -339,13 +474,39 @@ class AutoTrader:
                 "trade_log":  self.risk_manager.get_trade_log(20),
                 "mode":       "mock" if config.IS_MOCK_TRADING else "live"
             }
-            headers = {
-                "X-API-Key":    config.SERVER_API_KEY,
-                "Content-Type": "application/json"
-            }
-            resp = requests.post(
+        except Exception as e:
+            logger.warning(f"서버 동기화 오류: {e}")
+            return
+        self._io_q.put((self._post_sync, (payload,)))
+
+    @staticmethod
+    def _make_session() -> requests.Session:
+        """keep-alive 세션 (연결 풀 + 연결 실패 재시도, 공통 헤더)"""
+        http = requests.Session()
+        http.headers.update({
+            "X-API-Key":       config.SERVER_API_KEY,
+            "Accept-Encoding": "gzip",
+        })
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4,
+                              max_retries=Retry(total=2, backoff_factor=0.2))
+        http.mount("http://",  adapter)
+        http.mount("https://", adapter)
+        return http
+
+    def _post_sync(self, payload: Dict):
+        """[I/O 워커] 동기화 페이로드 POST"""
+        try:
+            if ORJSON_AVAILABLE:
+                body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+            else:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers = {"Content-Type": "application/json"}
+            if len(body) > _GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+            resp = self._http.post(
                 f"{config.SERVER_API_URL}/api/trading/sync",
-                json=payload, headers=headers, timeout=5
+                data=body, headers=headers, timeout=5
             )
             if resp.status_code == 200:
                 logger.debug("서버 동기화 완료")
@@ -355,37 +516,53 @@ class AutoTrader:
             logger.warning(f"서버 동기화 오류: {e}")
 
     def _send_status(self, status: str):
-        """시스템 상태 전송"""
+        """시스템 상태 전송 (I/O 워커에 위임)"""
+        self._io_q.put((self._post_status, (status, now_kst().isoformat())))
+
+    def _post_status(self, status: str, timestamp: str):
+        """[I/O 워커] 상태 POST"""
         try:
-            requests.post(
+            self._http.post(
                 f"{config.SERVER_API_URL}/api/trading/status",
-                json={"status": status, "timestamp": now_kst().isoformat()},
-                headers={"X-API-Key": config.SERVER_API_KEY},
+                json={"status": status, "timestamp": timestamp},
                 timeout=3
             )
         except Exception:
             pass
 
+    def _io_worker(self):
+        """큐에 쌓인 (함수, 인자)를 순서대로 실행 - (None, ()) 수신 시 종료"""
+        while True:
+            fn, args = self._io_q.get()
+            if fn is None:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning(f"[I/O 워커 오류] {e}")
+
     # ──────────────────────────────────────────────
     # 유틸리티
     # ──────────────────────────────────────────────
     def _is_market_hours(self) -> bool:
         """현재 장 시간 여부"""
-        now = now_kst().time()
-        open_t  = dtime(9, 0)
-        close_t = dtime(15, 30)
-        weekday = now_kst().weekday()
-        return weekday < 5 and open_t <= now <= close_t
+        now = now_kst()
+        return now.weekday() < 5 and config.MARKET_OPEN <= now.time() <= config.MARKET_CLOSE
 
     def _notify(self, message: str):
         """텔레그램 알림 전송"""
         logger.info(f"[알림] {message}")
         if not config.ENABLE_TELEGRAM:
             return
+        self._io_q.put((self._send_telegram, (message,)))
+
+    def _send_telegram(self, message: str):
+        """[I/O 워커] 텔레그램 전송 (봇 객체 재사용)"""
         try:
-            import telebot
-            bot = telebot.TeleBot(config.TELEGRAM_BOT_TOKEN)
-            bot.send_message(config.TELEGRAM_CHAT_ID, message)
+            if self._telebot is None:
+                import telebot
+                self._telebot = telebot.TeleBot(config.TELEGRAM_BOT_TOKEN)
+            self._telebot.send_message(config.TELEGRAM_CHAT_ID, message)
         except Exception as e:
             logger.warning(f"텔레그램 전송 실패: {e}")
 
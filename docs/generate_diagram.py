@@ -3,14 +3,29 @@
 # generate_diagram.py - 시스템 아키텍처 다이어그램 생성
 # ============================================================
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import gc
+import sys
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.patches as mpatches
+from matplotlib.colors import to_hex
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
 import matplotlib.patheffects as pe
 
-fig, ax = plt.subplots(1, 1, figsize=(18, 12))
+OUTPUT_PATH = '/home/user/kiwoom_trading/docs/architecture.png'
+DPI         = 150
+BG_COLOR    = '#0d1117'
+
+# PIL 렌더러용 도형 기록 (좌표는 matplotlib 데이터 좌표 0~18 × 0~12)
+#   ("box",   x, y, w, h, facecolor, edgecolor, linewidth, alpha, pad, corner)
+#   ("text",  x, y, text, fontsize, color, bold, va)
+#   ("arrow", x1, y1, x2, y2, color, linewidth)
+_SHAPES = []
+
+# pyplot 전역 레지스트리를 거치지 않는 Figure (저장 후 바로 해제)
+fig = Figure(figsize=(18, 12), layout='constrained')
+FigureCanvasAgg(fig)
+ax = fig.add_subplot(111)
 ax.set_xlim(0, 18)
 ax.set_ylim(0, 12)
 ax.axis('off')
@@ -21,37 +36,47 @@ def draw_box(ax, x, y, w, h, color, text_lines, font_sizes=None, alpha=0.9, corn
     box = FancyBboxPatch((x, y), w, h,
         boxstyle=f"round,pad=0.05,rounding_size={corner}",
         facecolor=color, edgecolor='white', linewidth=1.5, alpha=alpha, zorder=3)
+    box.set_rasterized(True)   # 벡터 출력(PDF/SVG)에서도 박스만 래스터, 글자는 벡터 유지
     ax.add_patch(box)
+    _SHAPES.append(("box", x, y, w, h, color, 'white', 1.5, alpha, 0.05, corner))
     if font_sizes is None:
         font_sizes = [10] * len(text_lines)
     total = sum(font_sizes)
     step = h / (len(text_lines) + 1)
     for i, (line, fs) in enumerate(zip(text_lines, font_sizes)):
-        ax.text(x + w/2, y + h - step*(i+1), line,
-            ha='center', va='center', fontsize=fs,
-            color='white', fontweight='bold' if i==0 else 'normal',
-            zorder=4)
+        draw_text(ax, x + w/2, y + h - step*(i+1), line, fs, 'white',
+            bold=(i == 0), va='center', zorder=4)
+
+def draw_panel(ax, x, y, w, h, facecolor, edgecolor):
+    panel = FancyBboxPatch((x, y), w, h,
+        boxstyle="round,pad=0.1", facecolor=facecolor, edgecolor=edgecolor,
+        linewidth=2, alpha=0.6, zorder=1)
+    panel.set_rasterized(True)
+    ax.add_patch(panel)
+    _SHAPES.append(("box", x, y, w, h, facecolor, edgecolor, 2, 0.6, 0.1, 0.1))
+
+def draw_text(ax, x, y, text, fontsize, color, bold=False, va='baseline', **kwargs):
+    ax.text(x, y, text, ha='center', va=va, fontsize=fontsize, color=color,
+        fontweight='bold' if bold else 'normal', **kwargs)
+    _SHAPES.append(("text", x, y, text, fontsize, color, bold, va))
 
 def draw_arrow(ax, x1, y1, x2, y2, color='#aaaaaa', lw=2, style='->'):
     ax.annotate('', xy=(x2, y2), xytext=(x1, y1),
         arrowprops=dict(arrowstyle=style, color=color, lw=lw), zorder=5)
+    _SHAPES.append(("arrow", x1, y1, x2, y2, color, lw))
 
 # ── 타이틀 ──
-ax.text(9, 11.5, '🚀 키움증권 자동매매 시스템 아키텍처', ha='center', va='center',
-    fontsize=18, color='white', fontweight='bold')
-ax.text(9, 11.0, '초기자본 100만원 | MA 크로스오버 전략 | Amazon Lightsail 서버',
-    ha='center', va='center', fontsize=12, color='#aaaaaa')
+draw_text(ax, 9, 11.5, '🚀 키움증권 자동매매 시스템 아키텍처', 18, 'white',
+    bold=True, va='center')
+draw_text(ax, 9, 11.0, '초기자본 100만원 | MA 크로스오버 전략 | Amazon Lightsail 서버', 12, '#aaaaaa',
+    va='center')
 
 # ══════════════════════════════════════════════
 # 왼쪽: 클라이언트 (Windows PC)
 # ══════════════════════════════════════════════
 # 큰 클라이언트 박스
-client_bg = FancyBboxPatch((0.3, 0.5), 6.5, 9.8,
-    boxstyle="round,pad=0.1", facecolor='#1a2744', edgecolor='#4488ff',
-    linewidth=2, alpha=0.6, zorder=1)
-ax.add_patch(client_bg)
-ax.text(3.55, 10.1, '🖥️  클라이언트 (Windows PC)', ha='center', fontsize=12,
-    color='#4488ff', fontweight='bold')
+draw_panel(ax, 0.3, 0.5, 6.5, 9.8, '#1a2744', '#4488ff')
+draw_text(ax, 3.55, 10.1, '🖥️  클라이언트 (Windows PC)', 12, '#4488ff', bold=True)
 
 # Kiwoom API
 draw_box(ax, 0.6, 8.2, 6.0, 1.4, '#1e3a5f',
@@ -102,13 +127,9 @@ draw_arrow(ax, 10.7, 5.2, 11.2, 5.2, '#ffaa00', lw=2)
 # 오른쪽: 서버 (Lightsail)
 # ══════════════════════════════════════════════
 # 큰 서버 박스
-server_bg = FancyBboxPatch((11.2, 0.5), 6.5, 9.8,
-    boxstyle="round,pad=0.1", facecolor='#1a3a1a', edgecolor='#44ff88',
-    linewidth=2, alpha=0.6, zorder=1)
-ax.add_patch(server_bg)
-ax.text(14.45, 10.1, '☁️  서버 (Amazon Lightsail)', ha='center', fontsize=12,
-    color='#44ff88', fontweight='bold')
-ax.text(14.45, 9.7, 'IP: 43.203.181.195', ha='center', fontsize=10, color='#888888')
+draw_panel(ax, 11.2, 0.5, 6.5, 9.8, '#1a3a1a', '#44ff88')
+draw_text(ax, 14.45, 10.1, '☁️  서버 (Amazon Lightsail)', 12, '#44ff88', bold=True)
+draw_text(ax, 14.45, 9.7, 'IP: 43.203.181.195', 10, '#888888')
 
 # FastAPI
 draw_box(ax, 11.5, 8.2, 5.8, 1.4, '#1e4d2b',
@@ -173,7 +194,88 @@ labels  = [l for _, l in legend_items]
 ax.legend(handles, labels, loc='lower center', bbox_to_anchor=(0.5, -0.02),
     ncol=5, framealpha=0.3, labelcolor='white', fontsize=9)
 
-plt.tight_layout()
-plt.savefig('/home/user/kiwoom_trading/docs/architecture.png',
-    dpi=150, bbox_inches='tight', facecolor='#0d1117')
+# ══════════════════════════════════════════════
+# PIL 렌더러 (단색 박스·화살표·글자만 → matplotlib 파이프라인 없이 직접 그림)
+# ══════════════════════════════════════════════
+_FONT_CANDIDATES = {
+    False: ['NanumGothic.ttf', 'malgun.ttf', 'NotoSansCJK-Regular.ttc', 'AppleGothic.ttf'],
+    True:  ['NanumGothicBold.ttf', 'malgunbd.ttf', 'NotoSansCJK-Bold.ttc', 'AppleGothic.ttf'],
+}
+
+def _load_font(ImageFont, size_px, bold):
+    for name in _FONT_CANDIDATES[bold]:
+        try:
+            return ImageFont.truetype(name, size_px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size_px)
+
+def render_pil(path, scale=DPI):
+    """_SHAPES 기록을 PIL로 그려 PNG 저장 (1 데이터 단위 = scale 픽셀)"""
+    from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+    img  = Image.new('RGB', (int(18 * scale), int(12 * scale)), BG_COLOR)
+    draw = ImageDraw.Draw(img, 'RGBA')   # 반투명 채우기 합성
+    fonts = {}
+
+    def px(x, y):
+        return x * scale, (12 - y) * scale
+
+    def rgba(color, alpha=1.0):
+        return ImageColor.getrgb(color)[:3] + (int(alpha * 255),)
+
+    def font(fontsize, bold):
+        size_px = round(fontsize * scale / 72)
+        if (size_px, bold) not in fonts:
+            fonts[(size_px, bold)] = _load_font(ImageFont, size_px, bold)
+        return fonts[(size_px, bold)]
+
+    for kind, *a in _SHAPES:
+        if kind == "box":
+            x, y, w, h, face, edge, lw, alpha, pad, corner = a
+            x0, y0 = px(x - pad, y + h + pad)
+            x1, y1 = px(x + w + pad, y - pad)
+            draw.rounded_rectangle((x0, y0, x1, y1), radius=corner * scale,
+                fill=rgba(face, alpha), outline=rgba(edge),
+                width=max(1, round(lw * scale / 72)))
+        elif kind == "text":
+            x, y, text, fontsize, color, bold, va = a
+            draw.text(px(x, y), text, fill=rgba(color), font=font(fontsize, bold),
+                anchor='mm' if va == 'center' else 'ms')
+        else:
+            x1, y1, x2, y2, color, lw = a
+            (sx, sy), (ex, ey) = px(x1, y1), px(x2, y2)
+            width = max(1, round(lw * scale / 72))
+            dx, dy = ex - sx, ey - sy
+            norm = max((dx * dx + dy * dy) ** 0.5, 1e-9)
+            ux, uy = dx / norm, dy / norm
+            head = 0.1 * scale
+            bx, by = ex - ux * head, ey - uy * head
+            draw.line((sx, sy, bx, by), fill=rgba(color), width=width)
+            draw.polygon([(ex, ey), (bx - uy * head / 2, by + ux * head / 2),
+                          (bx + uy * head / 2, by - ux * head / 2)], fill=rgba(color))
+
+    # 범례 (하단 중앙 한 줄)
+    label_font = font(9, False)
+    x = 9 * scale - len(legend_items) * 1.6 * scale / 2
+    y = (12 - 0.15) * scale
+    for handle, label in legend_items:
+        sw = 0.18 * scale
+        draw.rectangle((x, y - sw / 2, x + sw, y + sw / 2), fill=rgba(to_hex(handle.get_facecolor())))
+        draw.text((x + sw * 1.4, y), label, fill=rgba('white'), font=label_font, anchor='lm')
+        x += 1.6 * scale
+
+    # optimize=True는 compress_level을 무시하고 최대 압축 탐색 → 저장 시간 절충을 위해 레벨만 지정
+    img.save(path, compress_level=6)
+
+if '--pil' in sys.argv:
+    render_pil(OUTPUT_PATH)
+else:
+    fig.savefig(OUTPUT_PATH,
+        dpi=DPI, bbox_inches='tight', facecolor=BG_COLOR,
+        metadata={'Software': None},          # 버전 문자열 제외 (재생성 시 동일 파일)
+        pil_kwargs={'optimize': True})        # PIL 최적화 압축
+fig.clear()
+del fig, ax
+gc.collect()
 print("✅ 다이어그램 저장: architecture.png")
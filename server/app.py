@@ -3,27 +3,97 @@
 # 트레이딩 데이터 수신·저장·API 제공
 # ============================================================
 
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timezone, timedelta
 import os
-import json
+import hmac
+import zlib
+import time
+import orjson
+import hashlib
 import logging
 from database import get_db, init_db, TradingSnapshot, TradeRecord
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+# Redis (선택 - 없거나 REDIS_URL 미설정이면 최신 스냅샷도 DB에서 조회)
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 API_KEY = os.getenv("SERVER_API_KEY", "your-secret-api-key-here")
 
+_TRADE_INSERT_BATCH = 500   # 다중 VALUES 1회당 행 수 (PostgreSQL 바인드 파라미터 65535개 한도 이내)
+_RESPONSE_TTL       = 5.0   # 조회 응답 캐시 유지 시간 (초)
+_RESPONSE_CACHE_MAX = 32
+_SYNC_BODY_MAX      = 8 * 1024 * 1024   # 동기화 요청 본문 상한 (gzip 해제 후 기준, 초과 시 413)
+
+KST = timezone(timedelta(hours=9))   # 클라이언트 타임스탬프 기준 (오프셋 없는 값)
+
+# 최신 스냅샷 응답 본문을 Redis에 보관 (워커 간 공유, 동기화 수신 시 갱신)
+REDIS_URL   = os.getenv("REDIS_URL", "")
+_LATEST_KEY = "trading:latest"
+_LATEST_TTL = 60   # 초 - 갱신 누락 시에도 이 시간 뒤엔 DB 값으로 다시 채움
+_redis      = aioredis.from_url(REDIS_URL) if REDIS_AVAILABLE and REDIS_URL else None
+
 app = FastAPI(
     title="키움 자동매매 모니터링 API",
     description="100만원 자동매매 시스템 서버",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# ──────────────────────────────────────────────
+# gzip 요청 본문 해제 (Content-Encoding: gzip) - 동기화 라우터 전용
+# API 키 확인 후에만 해제, 해제 크기 상한 적용 (압축 폭탄 방지)
+# ──────────────────────────────────────────────
+def _gunzip(data: bytes) -> bytes:
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        body = d.decompress(data, _SYNC_BODY_MAX + 1)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip body")
+    if len(body) > _SYNC_BODY_MAX:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    if not d.eof:
+        raise HTTPException(status_code=400, detail="Truncated gzip body")
+    return body
+
+class GzipRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if len(body) > _SYNC_BODY_MAX:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                body = _gunzip(body)
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def gzip_route_handler(request: Request) -> Response:
+            # 본문 파싱(의존성 해석 전)보다 먼저 인증 → 미인증 요청은 본문을 읽지 않음
+            if not _api_key_ok(request.headers.get("X-API-Key")):
+                raise HTTPException(status_code=403, detail="Invalid API Key")
+            return await handler(GzipRequest(request.scope, request.receive))
+        return gzip_route_handler
+
+sync_router = APIRouter(route_class=GzipRoute)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -32,6 +102,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 gzip 압축 (행마다 키 이름이 반복되는 JSON 목록 → 전송량 대폭 감소)
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
 # ──────────────────────────────────────────────
 # Pydantic 모델
 # ──────────────────────────────────────────────
@@ -46,20 +119,85 @@ class StatusPayload(BaseModel):
     status:     str
     timestamp:  str
 
+def _parse_ts(value: Any) -> Optional[datetime]:
+    """ISO-8601 문자열 → aware datetime (TIMESTAMPTZ 컬럼용, 오프셋 없으면 KST) / 비었거나 형식 오류면 None"""
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=KST)
+
 # ──────────────────────────────────────────────
 # 인증
 # ──────────────────────────────────────────────
+_API_KEY_BYTES = API_KEY.encode()
+
+def _api_key_ok(x_api_key: Optional[str]) -> bool:
+    # 상수 시간 비교 (응답 시간으로 키 앞자리 추측 방지)
+    return x_api_key is not None and hmac.compare_digest(x_api_key.encode(), _API_KEY_BYTES)
+
 def verify_api_key(x_api_key: str = Header(...)):
-    if x_api_key != API_KEY:
+    if not _api_key_ok(x_api_key):
         raise HTTPException(status_code=403, detail="Invalid API Key")
     return x_api_key
 
+# ──────────────────────────────────────────────
+# 조회 응답 캐시 (path+query → (만료 시각, 본문, ETag)) + 조건부 요청(304)
+# 워커 프로세스별 캐시 - 동기화 수신 시 비우고, 다른 워커는 TTL로 만료
+# ──────────────────────────────────────────────
+_response_cache: Dict[str, tuple] = {}
+
+# 목록 응답 컬럼 (키 순서 = 응답 필드 순서)
+_SNAPSHOT_COLUMNS = (
+    TradingSnapshot.id, TradingSnapshot.timestamp, TradingSnapshot.portfolio_value,
+    TradingSnapshot.cash, TradingSnapshot.position_value, TradingSnapshot.total_pnl,
+    TradingSnapshot.total_pnl_pct, TradingSnapshot.daily_pnl, TradingSnapshot.position_count,
+    TradingSnapshot.win_rate, TradingSnapshot.mode,
+)
+_LATEST_COLUMNS = (
+    TradingSnapshot.timestamp, TradingSnapshot.portfolio_value, TradingSnapshot.cash,
+    TradingSnapshot.total_pnl, TradingSnapshot.total_pnl_pct, TradingSnapshot.daily_pnl,
+    TradingSnapshot.position_count, TradingSnapshot.holdings, TradingSnapshot.mode,
+)
+_TRADE_COLUMNS = (
+    TradeRecord.id, TradeRecord.timestamp, TradeRecord.trade_type.label("type"),
+    TradeRecord.code, TradeRecord.name, TradeRecord.quantity, TradeRecord.price,
+    TradeRecord.amount, TradeRecord.pnl, TradeRecord.reason, TradeRecord.portfolio_value,
+)
+
+def _cache_key(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}"
+
+def _cache_get(key: str) -> Optional[tuple]:
+    hit = _response_cache.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit
+    return None
+
+def _cache_put(key: str, data: Any) -> tuple:
+    body = data if isinstance(data, bytes) else orjson.dumps(data)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    if key not in _response_cache and len(_response_cache) >= _RESPONSE_CACHE_MAX:
+        _response_cache.pop(next(iter(_response_cache)))
+    hit = (time.monotonic() + _RESPONSE_TTL, body, etag)
+    _response_cache[key] = hit
+    return hit
+
+def _cached_response(request: Request, hit: tuple) -> Response:
+    _, body, etag = hit
+    headers = {"ETag": etag, "Cache-Control": f"max-age={int(_RESPONSE_TTL)}"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 # ──────────────────────────────────────────────
 # 시작 이벤트
 # ──────────────────────────────────────────────
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    await init_db()
     logger.info("✅ 서버 시작 - DB 초기화 완료")
 
 # ──────────────────────────────────────────────
@@ -78,14 +216,14 @@ def root():
 def health():
     return {"status": "healthy", "time": datetime.now().isoformat()}
 
-@app.post("/api/trading/sync")
-def receive_sync(payload: SyncPayload,
-                 db: Session = Depends(get_db),
-                 _: str = Depends(verify_api_key)):
-    """클라이언트에서 데이터 동기화 수신"""
+@sync_router.post("/api/trading/sync")
+async def receive_sync(payload: SyncPayload,
+                       db: AsyncSession = Depends(get_db),
+                       _: str = Depends(verify_api_key)):
+    """클라이언트에서 데이터 동기화 수신 (Core INSERT - ORM 인스턴스 생성 없음)"""
     try:
-        snap = TradingSnapshot(
-            timestamp        = payload.timestamp,
+        await db.execute(pg_insert(TradingSnapshot).values(
+            timestamp        = _parse_ts(payload.timestamp) or datetime.now(KST),
             portfolio_value  = payload.summary.get("portfolio_value", 0),
             cash             = payload.summary.get("cash", 0),
             position_value   = payload.summary.get("position_value", 0),
@@ -95,40 +233,73 @@ def receive_sync(payload: SyncPayload,
             position_count   = payload.summary.get("position_count", 0),
             win_rate         = payload.stats.get("win_rate_pct", 0),
             mode             = payload.mode,
-            holdings_json    = json.dumps(payload.summary.get("holdings", []), ensure_ascii=False)
-        )
-        db.add(snap)
+            holdings         = payload.summary.get("holdings", [])
+        ))
 
-        # 신규 거래 저장
+        # 신규 거래 저장 (이미 있는 키는 미리 걸러내고, 경합 시 중복은 DB 유니크 제약으로 무시)
+        # timestamp 없는 거래는 제외 - NULL은 유니크 인덱스에서 서로 다른 값이라 재동기화마다 중복 저장됨
+        rows = []
         for trade in payload.trade_log:
-            existing = db.query(TradeRecord).filter(
-                TradeRecord.timestamp == trade.get("timestamp"),
-                TradeRecord.code      == trade.get("code"),
-                TradeRecord.trade_type == trade.get("type")
-            ).first()
-            if not existing:
-                rec = TradeRecord(
-                    timestamp  = trade.get("timestamp", ""),
-                    trade_type = trade.get("type", ""),
-                    code       = trade.get("code", ""),
-                    name       = trade.get("name", ""),
-                    quantity   = trade.get("quantity", 0),
-                    price      = trade.get("price", 0),
-                    amount     = trade.get("amount", 0),
-                    pnl        = trade.get("pnl", 0),
-                    reason     = trade.get("reason", ""),
-                    portfolio_value = trade.get("portfolio_value", 0)
-                )
-                db.add(rec)
-
-        db.commit()
-        return {"success": True, "message": "동기화 완료"}
+            ts = _parse_ts(trade.get("timestamp"))
+            if ts is None:
+                logger.warning(f"timestamp 누락·형식 오류 거래 제외: {trade.get('timestamp')!r} "
+                               f"{trade.get('code', '')} {trade.get('type', '')}")
+                continue
+            rows.append({
+                "timestamp":       ts,
+                "trade_type":      trade.get("type", ""),
+                "code":            trade.get("code", ""),
+                "name":            trade.get("name", ""),
+                "quantity":        trade.get("quantity", 0),
+                "price":           trade.get("price", 0),
+                "amount":          trade.get("amount", 0),
+                "pnl":             trade.get("pnl", 0),
+                "reason":          trade.get("reason", ""),
+                "portfolio_value": trade.get("portfolio_value", 0),
+            })
+        rows = await _new_trade_rows(db, rows)
+        for i in range(0, len(rows), _TRADE_INSERT_BATCH):
+            stmt = pg_insert(TradeRecord).values(rows[i:i + _TRADE_INSERT_BATCH])\
+                                         .on_conflict_do_nothing(index_elements=["timestamp", "code", "trade_type"])
+            await db.execute(stmt)
+
+        await db.commit()
+        _response_cache.clear()
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"동기화 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    # 저장은 끝났으므로 캐시 갱신 실패는 로그만 남김
+    await _refresh_latest(db)
+    return {"success": True, "message": "동기화 완료"}
+
+
+async def _new_trade_rows(db: AsyncSession, rows: List[Dict]) -> List[Dict]:
+    """
+    저장된 적 없는 거래만 반환 - 매 동기화마다 같은 거래 로그 꼬리가 재전송되므로
+    최소 timestamp 이후 키 (timestamp, code, trade_type)를 한 번에 조회해 set으로 비교
+    """
+    if not rows:
+        return rows
+    result = await db.execute(
+        select(TradeRecord.timestamp, TradeRecord.code, TradeRecord.trade_type)
+        .where(TradeRecord.timestamp >= min(r["timestamp"] for r in rows))
+    )
+    seen  = set(result.tuples().all())
+    fresh = []
+    for r in rows:
+        key = (r["timestamp"], r["code"], r["trade_type"])
+        if key in seen:
+            continue
+        seen.add(key)
+        fresh.append(r)
+    return fresh
+
+
+app.include_router(sync_router)
+
 
 @app.post("/api/trading/status")
 def update_status(payload: StatusPayload,
@@ -139,71 +310,104 @@ def update_status(payload: StatusPayload,
 
 
 @app.get("/api/trading/snapshots")
-def get_snapshots(limit: int = 100, db: Session = Depends(get_db)):
+async def get_snapshots(request: Request, limit: int = 100, db: AsyncSession = Depends(get_db)):
     """최근 스냅샷 조회 (대시보드용)"""
-    snaps = db.query(TradingSnapshot)\
-              .order_by(TradingSnapshot.id.desc())\
-              .limit(limit)\
-              .all()
-    return [
-        {
-            "id":             s.id,
-            "timestamp":      s.timestamp,
-            "portfolio_value": s.portfolio_value,
-            "cash":           s.cash,
-            "position_value": s.position_value,
-            "total_pnl":      s.total_pnl,
-            "total_pnl_pct":  s.total_pnl_pct,
-            "daily_pnl":      s.daily_pnl,
-            "position_count": s.position_count,
-            "win_rate":       s.win_rate,
-            "mode":           s.mode
-        }
-        for s in reversed(snaps)
-    ]
+    key = _cache_key(request)
+    hit = _cache_get(key)
+    if hit is None:
+        hit = _cache_put(key, await _snapshots(db, limit))
+    return _cached_response(request, hit)
+
+
+async def _snapshots(db: AsyncSession, limit: int) -> List[Dict]:
+    # 응답 컬럼만 조회 (ORM 인스턴스 생성 없이 행 매핑 → dict)
+    result = await db.execute(select(*_SNAPSHOT_COLUMNS)
+                              .order_by(TradingSnapshot.id.desc())
+                              .limit(limit))
+    return [dict(r) for r in reversed(result.mappings().all())]
 
 
 @app.get("/api/trading/trades")
-def get_trades(limit: int = 100, db: Session = Depends(get_db)):
+async def get_trades(request: Request, limit: int = 100, db: AsyncSession = Depends(get_db)):
     """최근 거래 내역 조회"""
-    trades = db.query(TradeRecord)\
-               .order_by(TradeRecord.id.desc())\
-               .limit(limit)\
-               .all()
-    return [
-        {
-            "id":            t.id,
-            "timestamp":     t.timestamp,
-            "type":          t.trade_type,
-            "code":          t.code,
-            "name":          t.name,
-            "quantity":      t.quantity,
-            "price":         t.price,
-            "amount":        t.amount,
-            "pnl":           t.pnl,
-            "reason":        t.reason,
-            "portfolio_value": t.portfolio_value
-        }
-        for t in reversed(trades)
-    ]
+    key = _cache_key(request)
+    hit = _cache_get(key)
+    if hit is None:
+        hit = _cache_put(key, await _trades(db, limit))
+    return _cached_response(request, hit)
+
+
+async def _trades(db: AsyncSession, limit: int) -> List[Dict]:
+    result = await db.execute(select(*_TRADE_COLUMNS)
+                              .order_by(TradeRecord.id.desc())
+                              .limit(limit))
+    return [dict(r) for r in reversed(result.mappings().all())]
 
 
 @app.get("/api/trading/latest")
-def get_latest(db: Session = Depends(get_db)):
+async def get_latest(request: Request, db: AsyncSession = Depends(get_db)):
     """최신 스냅샷 반환"""
-    snap = db.query(TradingSnapshot)\
-             .order_by(TradingSnapshot.id.desc())\
-             .first()
-    if not snap:
+    key = _cache_key(request)
+    hit = _cache_get(key)
+    if hit is None:
+        body = await _load_latest()
+        if body is None:
+            data = await _latest(db)
+            body = orjson.dumps(data)
+            if "message" not in data:
+                await _store_latest(body)
+        hit = _cache_put(key, body)
+    return _cached_response(request, hit)
+
+
+async def _load_latest() -> Optional[bytes]:
+    if _redis is None:
+        return None
+    try:
+        return await _redis.get(_LATEST_KEY)
+    except Exception as e:
+        logger.warning(f"Redis 조회 실패 (DB 사용): {e}")
+        return None
+
+
+async def _store_latest(body: bytes):
+    if _redis is None:
+        return
+    try:
+        await _redis.set(_LATEST_KEY, body, ex=_LATEST_TTL)
+    except Exception as e:
+        logger.warning(f"Redis 저장 실패: {e}")
+        await _drop_latest()
+
+
+async def _drop_latest():
+    # 이전 값이 남아 있으면 조회가 DB로 넘어가지 않으므로 삭제 (실패해도 TTL로 만료)
+    try:
+        await _redis.delete(_LATEST_KEY)
+    except Exception as e:
+        logger.warning(f"Redis 삭제 실패: {e}")
+
+
+async def _refresh_latest(db: AsyncSession):
+    if _redis is None:
+        return
+    try:
+        body = orjson.dumps(await _latest(db))
+    except Exception as e:
+        logger.warning(f"최신 스냅샷 캐시 갱신 실패: {e}")
+        await _drop_latest()
+        return
+    await _store_latest(body)
+
+
+async def _latest(db: AsyncSession) -> Dict:
+    # 응답 컬럼만 조회 (ORM 인스턴스 생성 없음)
+    result = await db.execute(select(*_LATEST_COLUMNS)
+                              .order_by(TradingSnapshot.id.desc())
+                              .limit(1))
+    row    = result.mappings().first()
+    if row is None:
         return {"message": "데이터 없음"}
-    return {
-        "timestamp":      snap.timestamp,
-        "portfolio_value": snap.portfolio_value,
-        "cash":           snap.cash,
-        "total_pnl":      snap.total_pnl,
-        "total_pnl_pct":  snap.total_pnl_pct,
-        "daily_pnl":      snap.daily_pnl,
-        "position_count": snap.position_count,
-        "holdings":       json.loads(snap.holdings_json or "[]"),
-        "mode":           snap.mode
-    }
+    snap = dict(row)
+    snap["holdings"] = snap["holdings"] or []
+    return snap
@@ -6,6 +6,8 @@
 import os
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -20,6 +22,7 @@ import time
 API_URL = os.getenv("API_URL", "http://43.203.181.195:9000")
 INITIAL_CAPITAL = 1_000_000
 REFRESH_SEC = 30
+MAX_PLOT_POINTS = 800   # 자산 추이 차트 최대 표시 점 수 (초과 시 LTTB 다운샘플)
 
 st.set_page_config(
     page_title="키움 자동매매 대시보드",
@@ -55,32 +58,97 @@ st.markdown("""
 def _get_api_url():
     return st.session_state.get("api_url", API_URL)
 
+@st.cache_resource
+def http() -> requests.Session:
+    """API 서버 keep-alive 세션 (전체 사용자 세션 공유)"""
+    s = requests.Session()
+    s.headers.update({"Accept-Encoding": "gzip"})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+@st.cache_resource
+def _etag_store() -> dict:
+    """URL → (ETag, 마지막 응답) - 변경 없으면 서버가 304로 본문 생략"""
+    return {}
+
+def _get_json(url, default):
+    store   = _etag_store()
+    prev    = store.get(url)
+    headers = {"If-None-Match": prev[0]} if prev else {}
+    try:
+        r = http().get(url, headers=headers, timeout=5)
+        if r.status_code == 304 and prev:
+            return prev[1]
+        if r.status_code == 200:
+            data = r.json()
+            if r.headers.get("ETag"):
+                store[url] = (r.headers["ETag"], data)
+            return data
+    except Exception:
+        pass
+    return default
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 다운샘플 → 남길 행 인덱스
+    첫·마지막 점 유지, 가운데는 버킷마다 삼각형 면적이 가장 큰 점 1개
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # 가운데 n_out-2개 버킷 경계
+    idx   = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()            # 다음 버킷 평균점
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        idx[b + 1] = a
+    return idx
+
+def _rows_fingerprint(rows):
+    """행 목록 식별값 (개수 + 처음·마지막 id) - 전체 내용 해싱 대신 사용"""
+    return (len(rows), rows[0].get("id") if rows else None, rows[-1].get("id") if rows else None)
+
+@st.cache_data(ttl=REFRESH_SEC, hash_funcs={list: _rows_fingerprint})
+def snaps_to_df(snaps):
+    df = pd.DataFrame(snaps)
+    # 서버는 TIMESTAMPTZ를 UTC로 반환 → 차트 시간축은 KST
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601').dt.tz_convert('Asia/Seoul')
+    return df
+
+@st.cache_data(ttl=REFRESH_SEC, hash_funcs={list: _rows_fingerprint})
+def trades_to_df(trades):
+    df  = pd.DataFrame(trades)
+    pnl = df['pnl'].to_numpy()
+    # 서버는 TIMESTAMPTZ를 UTC로 반환 → 표시용 KST 변환
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601').dt.tz_convert('Asia/Seoul')
+    # 라벨은 마스크 단위로 조합 (행별 lambda 호출 없음)
+    prefix = np.select([pnl > 0, pnl < 0], ['🟢 +', '🔴 '], default='⚪ ')
+    amount = df['pnl'].map('{:,.0f}원'.format).to_numpy(dtype=object)
+    df['수익손실'] = np.where(pnl == 0, '-', prefix.astype(object) + amount)
+    df['유형']     = np.where(df['type'].to_numpy() == 'BUY', '📈 매수', '📉 매도')
+    return df
+
 @st.cache_data(ttl=REFRESH_SEC)
 def load_latest(api_url=None):
     url = api_url or API_URL
-    try:
-        r = requests.get(f"{url}/api/trading/latest", timeout=5)
-        return r.json() if r.status_code == 200 else {}
-    except:
-        return {}
+    return _get_json(f"{url}/api/trading/latest", {})
 
 @st.cache_data(ttl=REFRESH_SEC)
 def load_snapshots(api_url=None):
     url = api_url or API_URL
-    try:
-        r = requests.get(f"{url}/api/trading/snapshots?limit=200", timeout=5)
-        return r.json() if r.status_code == 200 else []
-    except:
-        return []
+    return _get_json(f"{url}/api/trading/snapshots?limit=200", [])
 
 @st.cache_data(ttl=REFRESH_SEC)
 def load_trades(api_url=None):
     url = api_url or API_URL
-    try:
-        r = requests.get(f"{url}/api/trading/trades?limit=100", timeout=5)
-        return r.json() if r.status_code == 200 else []
-    except:
-        return []
+    return _get_json(f"{url}/api/trading/trades?limit=100", [])
 
 # ──────────────────────────────────────────────
 # 사이드바
@@ -107,84 +175,91 @@ with st.sidebar:
 # 메인 콘텐츠
 # ──────────────────────────────────────────────
 st.title("📈 키움증권 자동매매 모니터링")
-st.markdown(f"*마지막 업데이트: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
 
 _api = st.session_state.get("api_url", API_URL)
-latest = load_latest(_api)
-snaps  = load_snapshots(_api)
-trades = load_trades(_api)
-
-if not latest or "message" in latest:
+if not (first := load_latest(_api)) or "message" in first:
     st.warning("⚠️ 클라이언트에서 데이터를 수신하지 못했습니다. 자동매매 클라이언트가 실행 중인지 확인하세요.")
     st.info("클라이언트를 실행하면 자동으로 이 대시보드에 데이터가 표시됩니다.")
     st.stop()
 
+# ── 구역별 fragment: refresh초마다 해당 구역만 재실행 (전체 스크립트·다른 탭 재실행 없음) ──
 # ── 상단 지표 카드 ──
-portfolio_val = latest.get("portfolio_value", INITIAL_CAPITAL)
-total_pnl     = latest.get("total_pnl", 0)
-total_pnl_pct = latest.get("total_pnl_pct", 0)
-daily_pnl     = latest.get("daily_pnl", 0)
-cash          = latest.get("cash", INITIAL_CAPITAL)
-pos_count     = latest.get("position_count", 0)
-mode          = latest.get("mode", "mock")
-
-pnl_color   = "#00ff88" if total_pnl >= 0 else "#ff4444"
-daily_color = "#00ff88" if daily_pnl >= 0 else "#ff4444"
-
-col1, col2, col3, col4, col5 = st.columns(5)
-
-with col1:
-    st.metric(
-        "💼 총 자산",
-        f"₩{portfolio_val:,.0f}",
-        f"{total_pnl:+,.0f}원",
-        delta_color="normal"
-    )
-with col2:
-    st.metric(
-        "📊 총 수익률",
-        f"{total_pnl_pct:+.2f}%",
-        f"₩{total_pnl:+,.0f}",
-        delta_color="normal"
-    )
-with col3:
-    st.metric(
-        "📅 일일 손익",
-        f"₩{daily_pnl:+,.0f}",
-        delta_color="normal"
-    )
-with col4:
-    st.metric(
-        "💰 현금",
-        f"₩{cash:,.0f}",
-        f"{cash/portfolio_val*100:.1f}%",
-        delta_color="off"
-    )
-with col5:
-    st.metric(
-        "🏦 보유 종목",
-        f"{pos_count}개",
-        delta_color="off"
-    )
-
-mode_badge = "🟢 실전" if mode == "live" else "🟡 모의"
-st.markdown(f"**모드**: {mode_badge} &nbsp;&nbsp; **초기자본**: ₩{INITIAL_CAPITAL:,}")
-st.divider()
+@st.fragment(run_every=refresh)
+def render_summary():
+    st.markdown(f"*마지막 업데이트: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+    latest = load_latest(_api)
+    if not latest or "message" in latest:
+        st.warning("⚠️ 최신 스냅샷을 불러오지 못했습니다.")
+        return
+
+    portfolio_val = latest.get("portfolio_value", INITIAL_CAPITAL)
+    total_pnl     = latest.get("total_pnl", 0)
+    total_pnl_pct = latest.get("total_pnl_pct", 0)
+    daily_pnl     = latest.get("daily_pnl", 0)
+    cash          = latest.get("cash", INITIAL_CAPITAL)
+    pos_count     = latest.get("position_count", 0)
+    mode          = latest.get("mode", "mock")
+
+    pnl_color   = "#00ff88" if total_pnl >= 0 else "#ff4444"
+    daily_color = "#00ff88" if daily_pnl >= 0 else "#ff4444"
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        st.metric(
+            "💼 총 자산",
+            f"₩{portfolio_val:,.0f}",
+            f"{total_pnl:+,.0f}원",
+            delta_color="normal"
+        )
+    with col2:
+        st.metric(
+            "📊 총 수익률",
+            f"{total_pnl_pct:+.2f}%",
+            f"₩{total_pnl:+,.0f}",
+            delta_color="normal"
+        )
+    with col3:
+        st.metric(
+            "📅 일일 손익",
+            f"₩{daily_pnl:+,.0f}",
+            delta_color="normal"
+        )
+    with col4:
+        st.metric(
+            "💰 현금",
+            f"₩{cash:,.0f}",
+            f"{cash/portfolio_val*100:.1f}%",
+            delta_color="off"
+        )
+    with col5:
+        st.metric(
+            "🏦 보유 종목",
+            f"{pos_count}개",
+            delta_color="off"
+        )
 
-# ── 탭 레이아웃 ──
-tab1, tab2, tab3, tab4 = st.tabs(["📈 자산 추이", "💼 보유 종목", "📋 거래 내역", "📊 성과 분석"])
+    mode_badge = "🟢 실전" if mode == "live" else "🟡 모의"
+    st.markdown(f"**모드**: {mode_badge} &nbsp;&nbsp; **초기자본**: ₩{INITIAL_CAPITAL:,}")
+    st.divider()
+
+render_summary()
 
 # ────────────────────────────────
 # TAB 1: 자산 추이 차트
 # ────────────────────────────────
-with tab1:
+@st.fragment(run_every=refresh)
+def render_asset_tab():
+    snaps = load_snapshots(_api)
     if snaps:
-        df_snap = pd.DataFrame(snaps)
-        df_snap['timestamp'] = pd.to_datetime(df_snap['timestamp'], utc=True, format='ISO8601')
+        df_snap = snaps_to_df(snaps)
+        ts  = df_snap['timestamp']
+        val = df_snap['portfolio_value'].to_numpy(dtype=np.float64)
+        keep = lttb_indices((ts - ts.iloc[0]).dt.total_seconds().to_numpy(), val, MAX_PLOT_POINTS)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df_snap['timestamp'], y=df_snap['portfolio_value'],
+            x=ts.iloc[keep], y=val[keep],
             mode='lines+markers', name='총자산',
             line=dict(color='#00aaff', width=2),
             fill='tonexty', fillcolor='rgba(0,170,255,0.1)'
@@ -201,11 +276,12 @@ with tab1:
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        # 일일 손익 바차트
+        # 일일 손익 바차트 (daily_pnl은 당일 누적값 → KST 날짜별 마지막 스냅샷 값 1개)
+        daily = df_snap.set_index(ts)['daily_pnl'].resample('1D').last().dropna()
         fig2 = go.Figure()
-        colors = ['#00ff88' if v >= 0 else '#ff4444' for v in df_snap['daily_pnl']]
+        colors = np.where(daily.to_numpy() >= 0, '#00ff88', '#ff4444')
         fig2.add_trace(go.Bar(
-            x=df_snap['timestamp'], y=df_snap['daily_pnl'],
+            x=daily.index, y=daily.to_numpy(),
             marker_color=colors, name='일일 손익'
         ))
         fig2.update_layout(
@@ -220,13 +296,15 @@ with tab1:
 # ────────────────────────────────
 # TAB 2: 보유 종목
 # ────────────────────────────────
-with tab2:
+@st.fragment(run_every=refresh)
+def render_holdings_tab():
+    latest = load_latest(_api)
     holdings = latest.get("holdings", [])
     if holdings:
         df_hold = pd.DataFrame(holdings)
-        df_hold['수익률'] = df_hold['unrealized_pnl_pct'].apply(
-            lambda x: f"{'🟢' if x >= 0 else '🔴'} {x:+.2f}%"
-        )
+        pct = df_hold['unrealized_pnl_pct']
+        df_hold['수익률'] = np.where(pct.to_numpy() >= 0, '🟢 ', '🔴 ').astype(object) \
+                          + pct.map('{:+.2f}%'.format).to_numpy(dtype=object)
 
         # 보유 현황 테이블
         st.dataframe(
@@ -252,15 +330,11 @@ with tab2:
 # ────────────────────────────────
 # TAB 3: 거래 내역
 # ────────────────────────────────
-with tab3:
+@st.fragment(run_every=refresh)
+def render_trades_tab():
+    trades = load_trades(_api)
     if trades:
-        df_trade = pd.DataFrame(trades)
-        df_trade['수익손실'] = df_trade['pnl'].apply(
-            lambda x: f"{'🟢 +' if x > 0 else ('🔴 ' if x < 0 else '⚪ ')}{x:,.0f}원" if x != 0 else "-"
-        )
-        df_trade['유형'] = df_trade['type'].apply(
-            lambda x: "📈 매수" if x == "BUY" else "📉 매도"
-        )
+        df_trade = trades_to_df(trades)
 
         st.dataframe(
             df_trade[['timestamp','유형','name','code','quantity','price','amount','수익손실','reason']].rename(columns={
@@ -282,17 +356,24 @@ with tab3:
 # ────────────────────────────────
 # TAB 4: 성과 분석
 # ────────────────────────────────
-with tab4:
+@st.fragment(run_every=refresh)
+def render_performance_tab():
+    trades = load_trades(_api)
     if trades:
-        sell_trades = [t for t in trades if t['type'] == 'SELL' and t['pnl'] != 0]
-        if sell_trades:
-            pnls     = [t['pnl'] for t in sell_trades]
-            wins     = [p for p in pnls if p > 0]
-            losses   = [p for p in pnls if p <= 0]
-            win_rate = len(wins) / len(pnls) * 100 if pnls else 0
-            avg_win  = sum(wins) / len(wins) if wins else 0
-            avg_loss = sum(losses) / len(losses) if losses else 0
-            pf       = abs(sum(wins) / sum(losses)) if losses and sum(losses) != 0 else 999
+        pnls = np.fromiter(
+            (t['pnl'] for t in trades if t['type'] == 'SELL' and t['pnl'] != 0),
+            dtype=np.float64
+        )
+        if pnls.size:
+            wins_mask = pnls > 0
+            win_sum   = pnls[wins_mask].sum()
+            loss_sum  = pnls[~wins_mask].sum()
+            n_wins    = int(wins_mask.sum())
+            n_losses  = pnls.size - n_wins
+            win_rate  = n_wins / pnls.size * 100
+            avg_win   = win_sum / n_wins if n_wins else 0
+            avg_loss  = loss_sum / n_losses if n_losses else 0
+            pf        = abs(win_sum / loss_sum) if loss_sum else 999
 
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("🎯 승률",      f"{win_rate:.1f}%")
@@ -301,10 +382,10 @@ with tab4:
             col4.metric("⚖️ 손익비",    f"{pf:.2f}")
 
             # 손익 분포 히스토그램
-            df_pnl = pd.DataFrame({"pnl": pnls})
             fig_hist = px.histogram(
-                df_pnl, x="pnl", nbins=20,
+                x=pnls, nbins=20,
                 title="손익 분포",
+                labels={"x": "pnl"},
                 color_discrete_sequence=['#00aaff'],
                 template='plotly_dark'
             )
@@ -312,12 +393,9 @@ with tab4:
             st.plotly_chart(fig_hist, use_container_width=True)
 
             # 누적 손익 라인
-            cum_pnl = pd.DataFrame({
-                "거래번호": range(1, len(pnls)+1),
-                "누적손익": pd.Series(pnls).cumsum()
-            })
             fig_cum = px.line(
-                cum_pnl, x="거래번호", y="누적손익",
+                x=np.arange(1, pnls.size + 1), y=np.cumsum(pnls),
+                labels={"x": "거래번호", "y": "누적손익"},
                 title="누적 손익 추이", template="plotly_dark"
             )
             fig_cum.add_hline(y=0, line_color="gray", line_dash="dash")
@@ -325,5 +403,13 @@ with tab4:
     else:
         st.info("청산된 거래가 없어 성과 분석을 표시할 수 없습니다.")
 
-# 자동 새로고침
-st.markdown(f"<meta http-equiv='refresh' content='{refresh}'>", unsafe_allow_html=True)
+# ── 탭 레이아웃 ──
+tab1, tab2, tab3, tab4 = st.tabs(["📈 자산 추이", "💼 보유 종목", "📋 거래 내역", "📊 성과 분석"])
+with tab1:
+    render_asset_tab()
+with tab2:
+    render_holdings_tab()
+with tab3:
+    render_trades_tab()
+with tab4:
+    render_performance_tab()
@@ -4,9 +4,10 @@
 # ============================================================
 
 import os
-from sqlalchemy import create_engine, Column, Integer, Float, String, Text, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, TIMESTAMP, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
 # DB 접속 정보 (환경변수 우선)
@@ -16,10 +17,28 @@ DB_NAME     = os.getenv("DB_NAME",     "trading_db")
 DB_USER     = os.getenv("DB_USER",     "trading_user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "trading_pass")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine       = create_engine(DATABASE_URL, pool_pre_ping=True, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 커넥션 풀 (워커당 크기 - uvicorn 워커 2개 × (20+10) = 60 < PostgreSQL max_connections 100)
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE",     "20"))
+DB_MAX_OVERFLOW  = int(os.getenv("DB_MAX_OVERFLOW",  "10"))
+DB_POOL_RECYCLE  = 1800   # 초 - 유휴 타임아웃으로 끊긴 연결 재사용 방지
+DB_POOL_TIMEOUT  = 10     # 초 - 풀 고갈 시 대기 한도
+DB_STMT_TIMEOUT  = "5000" # ms - 쿼리 1건 실행 한도
+
+# asyncpg 비동기 엔진 (요청 처리 중 이벤트 루프 블로킹 없음)
+engine       = create_async_engine(
+    DATABASE_URL,
+    echo          = False,
+    pool_pre_ping = True,
+    pool_size     = DB_POOL_SIZE,
+    max_overflow  = DB_MAX_OVERFLOW,
+    pool_recycle  = DB_POOL_RECYCLE,
+    pool_timeout  = DB_POOL_TIMEOUT,
+    pool_use_lifo = True,   # 최근 반납된(따뜻한) 연결 우선 재사용
+    connect_args  = {"server_settings": {"statement_timeout": DB_STMT_TIMEOUT}},
+)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 Base         = declarative_base()
 
 
@@ -30,8 +49,8 @@ class TradingSnapshot(Base):
     """포트폴리오 스냅샷 (주기적 저장)"""
     __tablename__ = "trading_snapshots"
 
-    id              = Column(Integer, primary_key=True, index=True)
-    timestamp       = Column(String(50), index=True)
+    id              = Column(Integer, primary_key=True)   # PK 인덱스 역방향 스캔으로 ORDER BY id DESC LIMIT 처리
+    timestamp       = Column(TIMESTAMP(timezone=True))
     portfolio_value = Column(Float, default=0)
     cash            = Column(Float, default=0)
     position_value  = Column(Float, default=0)
@@ -41,16 +60,20 @@ class TradingSnapshot(Base):
     position_count  = Column(Integer, default=0)
     win_rate        = Column(Float, default=0)
     mode            = Column(String(10), default="mock")
-    holdings_json   = Column(Text, default="[]")
+    holdings        = Column(JSONB, default=list)   # 보유 종목 목록 (드라이버가 직렬화)
     created_at      = Column(DateTime, default=datetime.utcnow)
 
 
 class TradeRecord(Base):
     """개별 거래 기록"""
     __tablename__ = "trade_records"
+    __table_args__ = (
+        # 동기화 중복 방지 (INSERT ... ON CONFLICT DO NOTHING 기준)
+        UniqueConstraint("timestamp", "code", "trade_type", name="uq_trade_dedup"),
+    )
 
-    id              = Column(Integer, primary_key=True, index=True)
-    timestamp       = Column(String(50), index=True)
+    id              = Column(Integer, primary_key=True)
+    timestamp       = Column(TIMESTAMP(timezone=True))
     trade_type      = Column(String(10))   # BUY | SELL
     code            = Column(String(10), index=True)
     name            = Column(String(50))
@@ -66,15 +89,84 @@ class TradeRecord(Base):
 # ──────────────────────────────────────────────
 # 유틸리티
 # ──────────────────────────────────────────────
-def init_db():
-    """테이블 초기화"""
-    Base.metadata.create_all(bind=engine)
+# 기존 DB 보정: holdings_json(TEXT) → holdings(JSONB)
+_MIGRATE_HOLDINGS = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'trading_snapshots' AND column_name = 'holdings_json') THEN
+        ALTER TABLE trading_snapshots ALTER COLUMN holdings_json DROP DEFAULT;
+        ALTER TABLE trading_snapshots ALTER COLUMN holdings_json TYPE JSONB
+            USING COALESCE(NULLIF(holdings_json, ''), '[]')::jsonb;
+        ALTER TABLE trading_snapshots ALTER COLUMN holdings_json SET DEFAULT '[]'::jsonb;
+        ALTER TABLE trading_snapshots RENAME COLUMN holdings_json TO holdings;
+    END IF;
+END $$;
+"""
+
+# 기존 DB 보정: 중복 인덱스 삭제 (PK 옆 ix_*_id, timestamp 단독) - create_all은 인덱스를 지우지 않음
+# 타입 변환 전에 실행해 ALTER COLUMN ... TYPE 중 재생성되지 않도록 함
+_DROP_REDUNDANT_INDEXES = """
+DO $$
+BEGIN
+    DROP INDEX IF EXISTS ix_trading_snapshots_id;
+    DROP INDEX IF EXISTS ix_trade_records_id;
+    DROP INDEX IF EXISTS ix_trading_snapshots_timestamp;
+    DROP INDEX IF EXISTS ix_trade_records_timestamp;
+    DROP INDEX IF EXISTS idx_snapshots_timestamp;
+    DROP INDEX IF EXISTS idx_trades_timestamp;
+END $$;
+"""
+
+# 기존 DB 보정: timestamp VARCHAR → TIMESTAMPTZ (오프셋 없는 값은 KST로 해석)
+_MIGRATE_TIMESTAMPS = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'trading_snapshots' AND column_name = 'timestamp'
+                 AND data_type = 'character varying') THEN
+        ALTER TABLE trading_snapshots ALTER COLUMN "timestamp" TYPE TIMESTAMPTZ
+            USING NULLIF("timestamp", '')::timestamp AT TIME ZONE 'Asia/Seoul';
+    END IF;
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'trade_records' AND column_name = 'timestamp'
+                 AND data_type = 'character varying') THEN
+        ALTER TABLE trade_records ALTER COLUMN "timestamp" TYPE TIMESTAMPTZ
+            USING NULLIF("timestamp", '')::timestamp AT TIME ZONE 'Asia/Seoul';
+    END IF;
+END $$;
+"""
+
+# 기존 DB 보정: 중복 거래 행 정리 후 uq_trade_dedup 생성 (ON CONFLICT 대상 - create_all은 기존 테이블에 추가 안 함)
+_MIGRATE_TRADE_DEDUP = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes
+                   WHERE tablename = 'trade_records' AND indexname = 'uq_trade_dedup') THEN
+        DELETE FROM trade_records a
+              USING trade_records b
+              WHERE a."timestamp" = b."timestamp" AND a.code = b.code
+                AND a.trade_type = b.trade_type AND a.id > b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_trade_dedup
+            ON trade_records ("timestamp", code, trade_type);
+    END IF;
+END $$;
+"""
+
+
+async def init_db():
+    """테이블 초기화 (+ 구 스키마 컬럼 변환)"""
+    async with engine.begin() as conn:
+        # 마이그레이션(컬럼 변환·중복 정리·인덱스 생성)은 요청용 statement_timeout 적용 제외
+        await conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.exec_driver_sql(_MIGRATE_HOLDINGS)
+        await conn.exec_driver_sql(_DROP_REDUNDANT_INDEXES)
+        await conn.exec_driver_sql(_MIGRATE_TIMESTAMPS)
+        await conn.exec_driver_sql(_MIGRATE_TRADE_DEDUP)
 
 
-def get_db():
+async def get_db():
     """FastAPI 의존성 주입용 DB 세션"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
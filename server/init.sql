@@ -1,7 +1,7 @@
 -- PostgreSQL 초기화 스크립트
 CREATE TABLE IF NOT EXISTS trading_snapshots (
     id              SERIAL PRIMARY KEY,
-    timestamp       VARCHAR(50),
+    timestamp       TIMESTAMPTZ,
     portfolio_value FLOAT DEFAULT 0,
     cash            FLOAT DEFAULT 0,
     position_value  FLOAT DEFAULT 0,
@@ -11,13 +11,13 @@ CREATE TABLE IF NOT EXISTS trading_snapshots (
     position_count  INTEGER DEFAULT 0,
     win_rate        FLOAT DEFAULT 0,
     mode            VARCHAR(10) DEFAULT 'mock',
-    holdings_json   TEXT DEFAULT '[]',
+    holdings        JSONB DEFAULT '[]'::jsonb,
     created_at      TIMESTAMP DEFAULT NOW()
 );
 
 CREATE TABLE IF NOT EXISTS trade_records (
     id              SERIAL PRIMARY KEY,
-    timestamp       VARCHAR(50),
+    timestamp       TIMESTAMPTZ,
     trade_type      VARCHAR(10),
     code            VARCHAR(10),
     name            VARCHAR(50),
@@ -30,6 +30,7 @@ CREATE TABLE IF NOT EXISTS trade_records (
     created_at      TIMESTAMP DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON trading_snapshots(timestamp);
-CREATE INDEX IF NOT EXISTS idx_trades_timestamp    ON trade_records(timestamp);
+-- 최근 N건 조회(ORDER BY id DESC LIMIT)는 PK 인덱스 역방향 스캔으로 처리
+-- timestamp 단독 인덱스는 불필요 (중복 검사는 uq_trade_dedup 선두 컬럼으로 커버)
 CREATE INDEX IF NOT EXISTS idx_trades_code         ON trade_records(code);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_trade_dedup   ON trade_records(timestamp, code, trade_type);